@@ -7,7 +7,8 @@ a = Analysis(
     binaries=[],
     datas=[
         ('./modules/Azure-ttk-theme-2.1.0', './modules/Azure-ttk-theme-2.1.0'),
-        ('./images', './images')
+        ('./images', './images'),
+        ('./modules/auras.json', './modules')
     ],
     hiddenimports=[],
     hookspath=[],
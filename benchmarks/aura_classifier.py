@@ -0,0 +1,116 @@
+# Compare the old per-aura loop of AuraDetector.detect_aura with the precomputed AuraClassifier
+# Run from the repo root: python -m benchmarks.aura_classifier
+import json, os, sys, time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.aura_classifier import AuraClassifier
+
+AURAS_PATH = os.path.join(os.path.dirname(__file__), "..", "modules", "auras.json")
+
+
+def rgb_distance(color1, color2):
+    return np.linalg.norm(np.array(color1) - np.array(color2))
+
+
+def hsv_distance(hsv1, hsv2):
+    hsv1 = hsv1.astype(int)
+    hsv2 = hsv2.astype(int)
+
+    dh = min(abs(hsv1[0] - hsv2[0]), 180 - abs(hsv1[0] - hsv2[0])) / 180.0
+    ds = abs(hsv1[1] - hsv2[1]) / 255.0
+    dv = abs(hsv1[2] - hsv2[2]) / 255.0
+    return np.sqrt(dh**2 + ds**2 + dv**2) * 255
+
+
+# The matching loop as it was in detect_aura before the classifier
+def legacy_classify(auras, center_color, star_type):
+    detected_hsv = cv2.cvtColor(np.uint8([[center_color]]), cv2.COLOR_RGB2HSV)[0][0]
+    aura_group = (auras["1m+"] | auras["10m+"] | auras["100m+"]) if star_type == "8_corners" else auras["10k+"]
+    best_aura = None
+    min_distance = float('inf')
+
+    for aura_name, aura_info in aura_group.items():
+        aura_rgb = aura_info["color"]
+        tolerance = aura_info["tolerance"]
+
+        distance_rgb = rgb_distance(center_color, aura_rgb)
+        if distance_rgb < tolerance:
+            aura_hsv = cv2.cvtColor(np.uint8([[aura_rgb]]), cv2.COLOR_RGB2HSV)[0][0]
+            distance_hsv = hsv_distance(detected_hsv, aura_hsv)
+
+            if distance_hsv < tolerance and distance_hsv < min_distance:
+                min_distance = distance_hsv
+                best_aura = (aura_name, aura_info)
+    return best_aura
+
+
+def load_auras():
+    with open(AURAS_PATH, "r") as file:
+        auras = json.load(file)
+    for rarity in auras.values():
+        for aura in rarity.values():
+            aura["color"] = np.array(aura["color"])
+    return auras
+
+
+# Pad every rarity group with random auras until the catalog holds `size` entries
+def grow_catalog(auras, size, rng):
+    grown = {rarity: dict(group) for rarity, group in auras.items()}
+    groups = ["10k+", "1m+", "10m+", "100m+"]
+    total = sum(len(group) for group in grown.values())
+    index = 0
+    while total < size:
+        rarity = groups[index % len(groups)]
+        grown.setdefault(rarity, {})[f"Synthetic {index}"] = {
+            "color": rng.integers(0, 256, 3),
+            "tolerance": int(rng.integers(20, 60)),
+            "rarity": int(rng.integers(1000, 10**9)),
+        }
+        total += 1
+        index += 1
+    return grown
+
+
+def time_per_call(func, samples, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for center_color, star_type in samples:
+            func(center_color, star_type)
+    return (time.perf_counter() - start) / (repeat * len(samples))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    base = load_auras()
+    # Half random colors, half jittered catalog colors so most samples have several candidates
+    catalog_colors = [aura["color"] for group in base.values() for aura in group.values()]
+    samples = []
+    for star_type in ("4_corners", "8_corners"):
+        for index in range(100):
+            if index % 2:
+                color = np.clip(catalog_colors[index % len(catalog_colors)] + rng.integers(-25, 26, 3), 0, 255)
+            else:
+                color = rng.integers(0, 256, 3)
+            samples.append((color, star_type))
+
+    print(f"{'auras':>6} {'legacy us':>10} {'classifier us':>14} {'speedup':>8}")
+    for size in (sum(len(group) for group in base.values()), 100, 200, 400, 800):
+        auras = grow_catalog(base, size, rng)
+        classifier = AuraClassifier(auras)
+
+        for center_color, star_type in samples:
+            expected = legacy_classify(auras, center_color, star_type)
+            result = classifier.classify(center_color, star_type)
+            if (expected and expected[0]) != (result and result[0]):
+                raise AssertionError(f"Mismatch for {center_color} ({star_type}): {expected and expected[0]} != {result and result[0]}")
+
+        legacy = time_per_call(lambda color, star: legacy_classify(auras, color, star), samples, 3)
+        fast = time_per_call(classifier.classify, samples, 3)
+        total = sum(len(group) for group in auras.values())
+        print(f"{total:>6} {legacy * 1e6:>10.1f} {fast * 1e6:>14.1f} {legacy / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
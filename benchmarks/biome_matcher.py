@@ -0,0 +1,65 @@
+# The old per-biome re.search loop against the compiled BiomeMatcher on typical OCR output
+# Run from the repo root: python -m benchmarks.biome_matcher [--repeat 20000]
+import argparse, os, re, sys, time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.biome_matcher import BiomeMatcher
+
+# BiomeDetector.biome_keywords
+BIOME_KEYWORDS = {
+    "Windy": r"Windy|winoy|WINDY",
+    "Rainy": r"Rainy|ramy|rain|rany|RAINY",
+    "Snowy": r"Snowy|snoy|snwy|snovy|SNOWY",
+    "Sandstorm": r"Sandstorm|sandst|storm|sndstorm|SAND STORM|SAND|STORM",
+    "Hell": r"Hell|hel|heii|HELL",
+    "Starfall": r"Starfall|stafall|sarfall|strfall|STARFALL",
+    "Corruption": r"Corruption|corupt|corrupton|corrup|CORRUPTION",
+    "Null": r"Null|nul|nui|nll|NULL",
+    "Glitched": r"\b\d\.\d{8,}\b",
+    "Graveyard" : r"Graveyard|grave|yard|GRAVEYARD",
+    "Pumpkin Moon": r"Pumpkin Moon|pumpkin|moon|PUMPKIN MOON|PUMPKIN|MOON|Pumpkinmoon|pumpkinmoon",
+}
+OCR_TEXTS = [
+    "[ WINDY ]", "[ RAINY ]", "[ SNOWY ]", "[ SAND STORM ]", "[ HELL ]", "[ STARFALL ]", "[ CORRUPTION ]", "[ NULL ]",
+    "[ 0.1428571429 ]", "[ GRAVEYARD ]", "[ PUMPKIN MOON ]", "[ NORMAL ]", "[ WINOY ]", "[ SNOVY }", "[ CORRUPTON ]",
+    "", "|", "[ NORMAL ] Rain", "Heavenly Potion", "Shell STARFALL",
+]
+
+
+def loop_match(text):
+    # detect_biome before BiomeMatcher
+    for biome_key, keyword in BIOME_KEYWORDS.items():
+        if re.search(keyword, text, re.IGNORECASE):
+            return biome_key
+    return None
+
+
+def time_per_call(match, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in OCR_TEXTS:
+            match(text)
+    return (time.perf_counter() - start) / (repeat * len(OCR_TEXTS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark biome keyword matching.")
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    matcher = BiomeMatcher(BIOME_KEYWORDS)
+    print(f"{'text':<20} {'regex loop':<14} {'matcher':<14} {'confidence':>10}")
+    for text in OCR_TEXTS:
+        biome, confidence = matcher.match(text)
+        print(f"{text!r:<20} {str(loop_match(text)):<14} {str(biome):<14} {confidence:>10.2f}")
+
+    loop_us = time_per_call(loop_match, args.repeat)
+    matcher_us = time_per_call(matcher.match, args.repeat)
+    print(f"\n{'matcher':<12} {'us/text':>9}")
+    print(f"{'regex loop':<12} {loop_us:>9.2f}")
+    print(f"{'BiomeMatcher':<12} {matcher_us:>9.2f}")
+    print(f"{loop_us / matcher_us:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# Loading and dispatching a path recording: JSON parsed and resolved per action against the compiled form
+# Run from the repo root: python -m benchmarks.compiled_recording [recording.json] [--repeat 200]
+import argparse, json, os, random, sys, tempfile, time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from pynput import mouse, keyboard
+from modules.compiled_recording import CompiledRecording, RecordingCache, AZERTY_MAP, MOUSE_PRESS, MOUSE_RELEASE, MOUSE_MOVE, KEY_PRESS
+
+KEY_MAP = {
+    "Key.space": keyboard.Key.space,
+    "Key.enter": keyboard.Key.enter,
+    "Key.shift": keyboard.Key.shift,
+    "Key.ctrl": keyboard.Key.ctrl,
+    "Key.alt": keyboard.Key.alt,
+    "Key.esc": keyboard.Key.esc,
+}
+
+
+class NullController:
+    # Stands in for the pynput controllers, only the dispatch cost is measured
+    position = (0, 0)
+
+    def press(self, target):
+        pass
+
+    def release(self, target):
+        pass
+
+
+def synthetic_recording(count=2000):
+    # A walk: held movement keys, a few jumps and clicks
+    random.seed(1)
+    actions, timestamp = [], 0.0
+    for _ in range(count // 2):
+        timestamp += random.uniform(0.01, 0.2)
+        if random.random() < 0.2:
+            x, y = random.randint(0, 1920), random.randint(0, 1080)
+            actions.append({"type": "mouse", "x": x, "y": y, "button": "Button.left", "pressed": True, "timestamp": timestamp})
+            actions.append({"type": "mouse", "x": x, "y": y, "button": "Button.left", "pressed": False, "timestamp": timestamp + 0.05})
+        else:
+            key = random.choice(["'w'", "'a'", "'s'", "'d'", "Key.space", "Key.shift"])
+            actions.append({"type": "keyboard", "key": key, "pressed": True, "timestamp": timestamp})
+            actions.append({"type": "keyboard", "key": key, "pressed": False, "timestamp": timestamp + 0.05})
+    return actions
+
+
+def dispatch_json(actions, mouse_controller, keyboard_controller, azerty=False):
+    # replay_actions before compiled recordings, without the waits
+    for action in actions:
+        if action["type"] == "mouse":
+            button = action["button"]
+            if action["pressed"]:
+                mouse_controller.position = (action["x"], action["y"])
+                if button == "Button.left":
+                    mouse_controller.press(mouse.Button.left)
+                elif button == "Button.right":
+                    mouse_controller.press(mouse.Button.right)
+            elif button == "Button.left":
+                mouse_controller.release(mouse.Button.left)
+            elif button == "Button.right":
+                mouse_controller.release(mouse.Button.right)
+        elif action["type"] == "keyboard":
+            key_str = AZERTY_MAP.get(action["key"], action["key"]) if azerty else action["key"]
+            key = KEY_MAP[key_str] if key_str in KEY_MAP else key_str.replace("'", "")
+            if action["pressed"]:
+                keyboard_controller.press(key)
+            else:
+                keyboard_controller.release(key)
+
+
+def dispatch_compiled(compiled, mouse_controller, keyboard_controller):
+    events, targets, xs, ys = compiled.events, compiled.action_targets, compiled.xs, compiled.ys
+    for index in range(len(events)):
+        event = events[index]
+        if event == KEY_PRESS:
+            keyboard_controller.press(targets[index])
+        elif event == MOUSE_PRESS:
+            mouse_controller.position = (xs[index], ys[index])
+            mouse_controller.press(targets[index])
+        elif event == MOUSE_RELEASE:
+            mouse_controller.release(targets[index])
+        elif event == MOUSE_MOVE:
+            mouse_controller.position = (xs[index], ys[index])
+        else:
+            keyboard_controller.release(targets[index])
+
+
+def time_per_run(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled path recordings.")
+    parser.add_argument("recording", nargs="?", help="A path_N_record.json, a synthetic walk otherwise")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = args.recording
+        if not path:
+            path = os.path.join(folder, "path_1_record.json")
+            with open(path, "w") as f:
+                json.dump(synthetic_recording(), f, indent=2)
+
+        def load_json():
+            with open(path, "r") as f:
+                return json.load(f)
+
+        cache_dir = os.path.join(folder, "compiled")
+        RecordingCache(cache_dir).load(path)
+        actions = load_json()
+        compiled = CompiledRecording.from_actions(actions)
+        memory_cache = RecordingCache(cache_dir)
+        memory_cache.load(path)
+
+        controller = NullController()
+        results = [
+            ("json.load", time_per_run(load_json, args.repeat)),
+            ("binary cache", time_per_run(lambda: RecordingCache(cache_dir).load(path), args.repeat)),
+            ("memory cache", time_per_run(lambda: memory_cache.load(path), args.repeat)),
+            ("dispatch json", time_per_run(lambda: dispatch_json(actions, controller, controller), args.repeat)),
+            ("dispatch compiled", time_per_run(lambda: dispatch_compiled(compiled, controller, controller), args.repeat)),
+        ]
+
+    print(f"{len(actions)} actions")
+    print(f"{'step':<18} {'ms':>8}")
+    for name, ms in results:
+        print(f"{name:<18} {ms:>8.3f}")
+    print(f"load {results[0][1] / results[2][1]:.0f}x faster from memory, dispatch {results[3][1] / results[4][1]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
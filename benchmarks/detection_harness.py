@@ -0,0 +1,206 @@
+# Replay a labeled folder of screenshots through AuraDetector and BiomeDetector, report speed and accuracy
+# Run from the repo root: python -m benchmarks.detection_harness path/to/frames --output result.json
+#
+# The folder holds full screen screenshots (png/jpg, processed in name order) and a labels.json like:
+#   {"0001.png": {"aura": "Comet", "biome": "Windy"}, "0002.png": {"aura": null, "biome": "Glitched"}}
+# A missing frame, field or null means nothing should be detected on that frame.
+import argparse, json, os, sys, tempfile, threading, time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.capture_backends import ReplayBackend
+from modules.frame_source import FrameSource
+
+AURAS_PATH = os.path.join(os.path.dirname(__file__), "..", "modules", "auras.json")
+
+
+def class_metrics(pairs):
+    # pairs of (label, predicted), None meaning "nothing"
+    classes = sorted({label for label, _ in pairs if label} | {predicted for _, predicted in pairs if predicted})
+    per_class = {}
+    for name in classes:
+        tp = sum(1 for label, predicted in pairs if label == name and predicted == name)
+        fp = sum(1 for label, predicted in pairs if predicted == name and label != name)
+        fn = sum(1 for label, predicted in pairs if label == name and predicted != name)
+        per_class[name] = {
+            "tp": tp, "fp": fp, "fn": fn,
+            "precision": tp / (tp + fp) if tp + fp else None,
+            "recall": tp / (tp + fn) if tp + fn else None,
+        }
+
+    tp = sum(1 for label, predicted in pairs if label and predicted == label)
+    fp = sum(1 for label, predicted in pairs if predicted and predicted != label)
+    fn = sum(1 for label, predicted in pairs if label and predicted != label)
+    overall = {
+        "tp": tp, "fp": fp, "fn": fn,
+        "precision": tp / (tp + fp) if tp + fp else None,
+        "recall": tp / (tp + fn) if tp + fn else None,
+    }
+    return {"overall": overall, "per_class": per_class}
+
+
+def latency_summary(stage_samples):
+    summary = {}
+    for stage, samples in sorted(stage_samples.items()):
+        values = np.array(samples) * 1000
+        summary[stage] = {
+            "count": len(samples),
+            "mean_ms": float(values.mean()),
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+        }
+    return summary
+
+
+def load_auras(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def run_harness(frames_dir, labels, config_path, auras_path, run_aura=True, run_biome=True, use_gate=False, glyphs_path=None):
+    backend = ReplayBackend(frames_dir)
+    # Both detectors must read the frame the harness just grabbed, never a newer one
+    source = FrameSource(backend, max_age=float("inf"))
+
+    aura_detector = biome_detector = None
+    if run_aura:
+        from modules.aura_detector import AuraDetector
+        aura_detector = AuraDetector(config_path, frame_source=source, auras=load_auras(auras_path))
+        if not use_gate:
+            aura_detector.frame_gate.threshold = -1
+
+    if run_biome:
+        from modules.biome_detector import BiomeDetector
+        biome_detector = BiomeDetector(threading.Event(), config_path, frame_source=source)
+        biome_detector.frame_max_age = float("inf")
+        if not use_gate:
+            biome_detector.frame_gate.threshold = -1
+        # The live recognizer reads and writes the user's templates and learns from earlier frames while later ones
+        # are scored. Only a given template file is used, frozen, so results don't depend on frame order or past runs
+        recognizer = biome_detector.glyph_recognizer
+        biome_detector.glyph_recognizer = None
+        if recognizer is not None and glyphs_path:
+            from modules.glyph_recognizer import GlyphRecognizer
+            biome_detector.glyph_recognizer = GlyphRecognizer(
+                recognizer.words.values(), recognizer.number_pattern.pattern if recognizer.number_pattern else None, glyphs_path, frozen=True
+            )
+
+    stage_samples = {}
+    aura_pairs, biome_pairs, per_frame = [], [], []
+    detection_time = 0
+
+    while True:
+        frame = source.get_frame(max_age=0)
+        if frame is None:
+            break
+        name = backend.frame_name
+        label = labels.get(name, {})
+        record = {"frame": name}
+
+        if aura_detector:
+            start = time.perf_counter()
+            result = aura_detector.find_aura(frame)
+            elapsed = time.perf_counter() - start
+            detection_time += elapsed
+            stage_samples.setdefault("aura.total", []).append(elapsed)
+            for stage, seconds in aura_detector.stage_times.items():
+                stage_samples.setdefault(f"aura.{stage}", []).append(seconds)
+
+            predicted = result[1][0] if result and result[1] else None
+            aura_pairs.append((label.get("aura"), predicted))
+            record["aura"] = {"label": label.get("aura"), "predicted": predicted, "star": result[0] if result else None}
+
+        if biome_detector:
+            start = time.perf_counter()
+            text = biome_detector.capture_biome_text(force=biome_detector.glitch_pending())
+            stage_times = dict(biome_detector.stage_times)
+            predicted = biome_detector.match_biome(text) if text is not None else None
+            elapsed = time.perf_counter() - start
+            detection_time += elapsed
+            stage_times.update(biome_detector.stage_times)
+            stage_samples.setdefault("biome.total", []).append(elapsed)
+            for stage, seconds in stage_times.items():
+                stage_samples.setdefault(f"biome.{stage}", []).append(seconds)
+
+            biome_pairs.append((label.get("biome"), predicted))
+            confidence = biome_detector.match_confidence if text is not None else None
+            record["biome"] = {"label": label.get("biome"), "predicted": predicted, "confidence": confidence, "text": text}
+
+        per_frame.append(record)
+
+    backend.close()
+    frames = len(per_frame)
+    result = {
+        "source": os.path.abspath(frames_dir),
+        "frames": frames,
+        "fps": frames / detection_time if detection_time else None,
+        "stages": latency_summary(stage_samples),
+        "per_frame": per_frame,
+    }
+    if aura_detector:
+        result["aura"] = class_metrics(aura_pairs)
+        result["aura"]["frame_gate"] = aura_detector.frame_gate.stats()
+    if biome_detector:
+        result["biome"] = class_metrics(biome_pairs)
+        result["biome"]["frame_gate"] = biome_detector.frame_gate.stats()
+    return result
+
+
+def format_ratio(value):
+    return "-" if value is None else f"{value:.0%}"
+
+
+def print_report(result):
+    fps = result["fps"]
+    print(f"{result['frames']} frames from {result['source']}, {fps:.2f} frames/s" if fps else f"{result['frames']} frames")
+
+    print(f"\n{'stage':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for stage, summary in result["stages"].items():
+        print(f"{stage:<18} {summary['count']:>6} {summary['p50_ms']:>9.2f} {summary['p95_ms']:>9.2f}")
+
+    for detector in ("aura", "biome"):
+        if detector not in result:
+            continue
+        metrics = result[detector]
+        print(f"\n{detector:<18} {'tp':>4} {'fp':>4} {'fn':>4} {'precision':>10} {'recall':>8}")
+        for name, values in list(metrics["per_class"].items()) + [("overall", metrics["overall"])]:
+            print(f"{name:<18} {values['tp']:>4} {values['fp']:>4} {values['fn']:>4} {format_ratio(values['precision']):>10} {format_ratio(values['recall']):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline speed and accuracy harness for the aura and biome detectors.")
+    parser.add_argument("frames", help="Folder of screenshots with a labels.json")
+    parser.add_argument("--labels", help="Labels file, defaults to <frames>/labels.json")
+    parser.add_argument("--config", help="config.json to build the detectors with, defaults to an empty config")
+    parser.add_argument("--auras", default=AURAS_PATH, help="Aura catalog, defaults to modules/auras.json")
+    parser.add_argument("--output", default="harness_result.json", help="Where to write the JSON result")
+    parser.add_argument("--skip-aura", action="store_true")
+    parser.add_argument("--skip-biome", action="store_true")
+    parser.add_argument("--gate", action="store_true", help="Keep the unchanged-frame gate on, like the live macro")
+    parser.add_argument("--glyphs", help="Glyph templates (.npz) to read banners with before OCR, never written. Without it biomes are OCR only")
+    args = parser.parse_args()
+
+    labels_path = args.labels or os.path.join(args.frames, "labels.json")
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path, "r") as file:
+            labels = json.load(file)
+    else:
+        print(f"No labels found at {labels_path}, every frame counts as empty.")
+
+    config_path = args.config
+    if not config_path:
+        config_path = os.path.join(tempfile.gettempdir(), "dsim_harness_config.json")
+        with open(config_path, "w") as file:
+            json.dump({}, file)
+
+    result = run_harness(args.frames, labels, config_path, args.auras, not args.skip_aura, not args.skip_biome, args.gate, args.glyphs)
+    print_report(result)
+
+    with open(args.output, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"\nResult written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Biome banner reads by GlyphRecognizer against tesseract: how often the glyphs answer, how often they're right
+# and how long each takes. Glyphs are learned from one set of banners and evaluated on a fresh one
+# Run from the repo root: python -m benchmarks.glyph_recognizer [--train 3] [--test 5]
+import argparse, os, sys, tempfile, time
+import numpy as np
+import pytesseract
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.glyph_recognizer import GlyphRecognizer
+from modules.ocr_engine import OcrEngine
+from modules.ocr_preprocess import OcrPreprocessor
+from benchmarks.ocr_latency import TESSERACT_PATHS
+from benchmarks.ocr_preprocess import BANNER_TEXTS, render_banner
+
+BIOME_WORDS = ["Windy", "Rainy", "Snowy", "Sandstorm", "Hell", "Starfall", "Corruption", "Null", "Graveyard", "Pumpkin Moon", "Normal"]
+GLITCHED_PATTERN = r"\b\d\.\d{8,}\b"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the glyph recognizer on biome banners.")
+    parser.add_argument("--train", type=int, default=3, help="Rendered banners per biome to learn from")
+    parser.add_argument("--test", type=int, default=5, help="Rendered banners per biome to read")
+    args = parser.parse_args()
+
+    for path in TESSERACT_PATHS:
+        if os.path.exists(path):
+            pytesseract.pytesseract.tesseract_cmd = path
+            break
+
+    preprocessor = OcrPreprocessor.from_config({}, "Biome_Region")
+    with tempfile.TemporaryDirectory() as folder:
+        recognizer = GlyphRecognizer(BIOME_WORDS, GLITCHED_PATTERN, os.path.join(folder, "glyphs.npz"))
+        rng = np.random.default_rng(1)
+        learned = sum(recognizer.learn(preprocessor(render_banner(text, rng)), f"[ {text} ]", verified=True) for _ in range(args.train) for text in BANNER_TEXTS)
+        print(f"learned from {learned}/{args.train * len(BANNER_TEXTS)} banners: {recognizer.stats()['templates']} templates")
+
+        rng = np.random.default_rng(2)
+        banners = [(text, preprocessor(render_banner(text, rng))) for _ in range(args.test) for text in BANNER_TEXTS]
+        engine = OcrEngine(cache_size=0)
+        engine.image_to_string(np.full((32, 32), 255, dtype=np.uint8))
+
+        correct, wrong, glyph_time, ocr_time, ocr_correct = 0, 0, 0.0, 0.0, 0
+        for text, binary in banners:
+            start = time.perf_counter()
+            result = recognizer.recognize(binary)
+            glyph_time += time.perf_counter() - start
+            if result is not None:
+                if recognizer.core(result) == recognizer.core(text):
+                    correct += 1
+                else:
+                    wrong += 1
+                    print(f"  {text!r} read as {result!r}")
+
+            start = time.perf_counter()
+            ocr_result = engine.image_to_string(binary)
+            ocr_time += time.perf_counter() - start
+            ocr_correct += recognizer.core(ocr_result) == recognizer.core(text)
+        engine.close()
+
+    count = len(banners)
+    answered = correct + wrong
+    print(f"{count} banners")
+    print(f"{'reader':<10} {'answered':>9} {'correct':>9} {'ms/read':>9}")
+    print(f"{'glyphs':<10} {answered:>4}/{count:<4} {correct:>4}/{answered:<4} {glyph_time / count * 1000:>9.2f}")
+    print(f"{'tesseract':<10} {count:>4}/{count:<4} {ocr_correct:>4}/{count:<4} {ocr_time / count * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Merchant item slots read one OCR call per slot against one stitched OcrEngine.image_to_strings call
+# Run from the repo root: python -m benchmarks.ocr_batch [--rounds 20]
+import argparse, os, sys, time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.ocr_engine import OcrEngine
+from modules.ocr_preprocess import OcrPreprocessor
+from benchmarks.ocr_preprocess import render_banner
+
+ITEM_NAMES = ["Heavenly Potion II", "Lucky Potion", "Speed Potion", "Gear Basing A", "Void Coin", "Fortune Spoid I", "Gilded Coin", "Oblivion Potion"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched merchant slot OCR.")
+    parser.add_argument("--rounds", type=int, default=20, help="Merchant visits, 5 slots each")
+    parser.add_argument("--threshold", default="adaptive", help="'none' for the item_name_ocr_pos default (gray, read slot by slot)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(2)
+    # Only binarized regions are stitched, what OcrPreprocess.item_name_ocr_pos has to be set to for batching
+    threshold = None if args.threshold == "none" else args.threshold
+    preprocessor = OcrPreprocessor.from_config({"OcrPreprocess": {"item_name_ocr_pos": {"threshold": threshold, "trim": threshold is not None}}}, "item_name_ocr_pos")
+    engine = OcrEngine(cache_size=0)
+    api = engine.acquire()
+    if api is None:
+        print("libtesseract could not be loaded, the engine would fall back to pytesseract.")
+        return
+    engine.pool.put(api)
+
+    single_times, batch_times, same, total = [], [], 0, 0
+    for _ in range(args.rounds):
+        names = rng.choice(ITEM_NAMES, 5, replace=False)
+        regions = [preprocessor(render_banner(name, rng, width=240, height=30)) for name in names]
+
+        start = time.perf_counter()
+        single = [engine.image_to_string(region, config="--psm 6") for region in regions]
+        single_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        batched = engine.image_to_strings(regions, config="--psm 6")
+        batch_times.append(time.perf_counter() - start)
+
+        for a, b in zip(single, batched):
+            same += a.strip() == b.strip()
+            total += 1
+            if a.strip() != b.strip():
+                print(f"  single {a.strip()!r} vs batched {b.strip()!r}")
+
+    single_ms, batch_ms = np.array(single_times) * 1000, np.array(batch_times) * 1000
+    print(f"{args.rounds} merchant visits, 5 slots each")
+    print(f"{'mode':<10} {'mean ms':>9} {'p95 ms':>9}")
+    print(f"{'per slot':<10} {single_ms.mean():>9.2f} {np.percentile(single_ms, 95):>9.2f}")
+    print(f"{'batched':<10} {batch_ms.mean():>9.2f} {np.percentile(batch_ms, 95):>9.2f}")
+    print(f"\n{single_ms.mean() / batch_ms.mean():.1f}x faster, same text on {same}/{total} slots")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
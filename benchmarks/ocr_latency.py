@@ -0,0 +1,98 @@
+# Per-call OCR latency of pytesseract (a tesseract process per call) against the pooled in-process OcrEngine,
+# with its result cache off and on
+# Run from the repo root: python -m benchmarks.ocr_latency [--images folder] [--calls 50]
+# Without --images it renders biome banners and merchant item names like the ones the macro reads
+import argparse, os, sys, time
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.ocr_engine import OcrEngine
+
+SAMPLE_TEXTS = [
+    ("[ WINDY ]", ""), ("[ SANDSTORM ]", ""), ("[ 0.1428571429 ]", ""),
+    ("Jester", ""), ("Heavenly Potion II", "--psm 6"), ("Gear Basing A", "--psm 6"),
+]
+TESSERACT_PATHS = [r"C:\Program Files\Tesseract-OCR\tesseract.exe", r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe"]
+
+
+def render_text(text):
+    # White text with a dark outline on a dark background, roughly the in-game style
+    image = np.full((32, 12 * len(text) + 24, 3), 30, dtype=np.uint8)
+    cv2.putText(image, text, (12, 23), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 3, cv2.LINE_AA)
+    cv2.putText(image, text, (12, 23), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
+    return image
+
+
+def load_samples(folder):
+    if not folder:
+        return [(render_text(text), config) for text, config in SAMPLE_TEXTS]
+    samples = []
+    for filename in sorted(os.listdir(folder)):
+        if filename.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")):
+            image = cv2.imread(os.path.join(folder, filename), cv2.IMREAD_COLOR)
+            samples.append((cv2.cvtColor(image, cv2.COLOR_BGR2RGB), ""))
+    return samples
+
+
+def time_calls(read, samples, calls):
+    times, texts = [], []
+    for index in range(calls):
+        image, config = samples[index % len(samples)]
+        start = time.perf_counter()
+        text = read(image, config)
+        times.append(time.perf_counter() - start)
+        if index < len(samples):
+            texts.append(text.strip())
+    return np.array(times) * 1000, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-call OCR latency.")
+    parser.add_argument("--images", help="Folder of cropped OCR regions, defaults to rendered samples")
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    for path in TESSERACT_PATHS:
+        if os.path.exists(path):
+            pytesseract.pytesseract.tesseract_cmd = path
+            break
+
+    samples = load_samples(args.images)
+    # No cache, every call really runs tesseract
+    engine = OcrEngine(cache_size=0)
+    # Load the engine before timing, the macro pays that once at the first read
+    api = engine.acquire()
+    if api is None:
+        print("libtesseract could not be loaded, the engine would fall back to pytesseract.")
+        return
+    engine.pool.put(api)
+
+    results = {
+        "pytesseract": time_calls(lambda image, config: pytesseract.image_to_string(Image.fromarray(image), config=config), samples, args.calls),
+        "OcrEngine": time_calls(engine.image_to_string, samples, args.calls),
+    }
+    cached_engine = OcrEngine(cache_size=len(samples))
+    cached_engine.library, cached_engine.data_dir = engine.library, engine.data_dir
+    results["+ cache"] = time_calls(cached_engine.image_to_string, samples, args.calls)
+
+    print(f"{args.calls} calls over {len(samples)} images")
+    print(f"{'backend':<12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, (times, _) in results.items():
+        print(f"{name:<12} {times.mean():>9.2f} {np.percentile(times, 50):>9.2f} {np.percentile(times, 95):>9.2f}")
+
+    speedup = results["pytesseract"][0].mean() / results["OcrEngine"][0].mean()
+    same = sum(a == b for a, b in zip(results["pytesseract"][1], results["OcrEngine"][1]))
+    print(f"\n{speedup:.1f}x faster per call, same text on {same}/{len(results['OcrEngine'][1])} images")
+    for (a, b) in zip(results["pytesseract"][1], results["OcrEngine"][1]):
+        if a != b:
+            print(f"  pytesseract {a!r} vs engine {b!r}")
+    print(f"cache: {cached_engine.cache.stats()}")
+    engine.close()
+    cached_engine.close()
+
+
+if __name__ == "__main__":
+    main()
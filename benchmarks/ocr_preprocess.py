@@ -0,0 +1,100 @@
+# Accuracy and speed of the biome banner OCR with the old PIL enhance against OcrPreprocessor
+# Run from the repo root: python -m benchmarks.ocr_preprocess [--images folder] [--repeat 3]
+# Without --images it renders banners (white text, dark outline, noisy gradient) at the default 190x27 Biome_Region
+# A folder holds banner crops named after their text, e.g. "WINDY.png" or "0.1428571429_2.png"
+import argparse, os, sys, time
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image, ImageEnhance
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.ocr_engine import OcrEngine
+from modules.ocr_preprocess import OcrPreprocessor, REGION_DEFAULTS
+from benchmarks.ocr_latency import TESSERACT_PATHS
+
+BANNER_TEXTS = ["WINDY", "RAINY", "SNOWY", "SAND STORM", "HELL", "STARFALL", "CORRUPTION", "NULL", "GRAVEYARD", "PUMPKIN MOON", "0.1428571429", "NORMAL"]
+
+
+def render_banner(text, rng, width=190, height=27):
+    gradient = np.linspace(0.6, 1.0, width)[None, :, None]
+    image = rng.integers(40, 200, 3) * gradient + rng.normal(0, 12, (height, width, 3))
+    image = image.clip(0, 255).astype(np.uint8)
+    text = f"[ {text} ]"
+    scale = 0.5 if len(text) < 14 else 0.4
+    (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_DUPLEX, scale, 1)
+    origin = ((width - text_w) // 2, (height + text_h) // 2)
+    cv2.putText(image, text, origin, cv2.FONT_HERSHEY_DUPLEX, scale, (0, 0, 0), 3, cv2.LINE_AA)
+    cv2.putText(image, text, origin, cv2.FONT_HERSHEY_DUPLEX, scale, (255, 255, 255), 1, cv2.LINE_AA)
+    return image
+
+
+def load_banners(folder, repeat):
+    if not folder:
+        rng = np.random.default_rng(1)
+        return [(text, render_banner(text, rng)) for _ in range(repeat) for text in BANNER_TEXTS]
+    banners = []
+    for filename in sorted(os.listdir(folder)):
+        if filename.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")):
+            text = os.path.splitext(filename)[0].rsplit("_", 1)[0]
+            image = cv2.imread(os.path.join(folder, filename), cv2.IMREAD_COLOR)
+            banners.append((text, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+    return banners
+
+
+def legacy_enhance(region):
+    # capture_biome_text before OcrPreprocessor
+    screenshot = ImageEnhance.Contrast(Image.fromarray(region)).enhance(1.65)
+    return ImageEnhance.Brightness(screenshot).enhance(1.05)
+
+
+def normalize(text):
+    return "".join(char for char in text.upper() if char.isalnum() or char == ".")
+
+
+def evaluate(engine, banners, prepare):
+    correct, prepare_time, ocr_time = 0, 0.0, 0.0
+    for text, image in banners:
+        start = time.perf_counter()
+        ocr_input = prepare(image)
+        prepare_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = engine.image_to_string(ocr_input)
+        ocr_time += time.perf_counter() - start
+        correct += normalize(result) == normalize(text)
+    count = len(banners)
+    return correct, prepare_time / count * 1000, ocr_time / count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing on biome banners.")
+    parser.add_argument("--images", help="Folder of banner crops named after their text")
+    parser.add_argument("--repeat", type=int, default=3, help="Rendered banners per biome")
+    args = parser.parse_args()
+
+    for path in TESSERACT_PATHS:
+        if os.path.exists(path):
+            pytesseract.pytesseract.tesseract_cmd = path
+            break
+
+    banners = load_banners(args.images, args.repeat)
+    engine = OcrEngine(cache_size=0)
+    # Load tesseract before timing anything
+    engine.image_to_string(np.full((32, 32), 255, dtype=np.uint8))
+    defaults = REGION_DEFAULTS["Biome_Region"]
+    variants = {
+        "PIL enhance": legacy_enhance,
+        "LUT enhance": OcrPreprocessor(defaults["contrast"], defaults["brightness"]).enhance,
+        "Biome_Region default": OcrPreprocessor(**defaults),
+    }
+
+    print(f"{len(banners)} banners")
+    print(f"{'preprocessing':<22} {'correct':>9} {'prep ms':>8} {'ocr ms':>8}")
+    for name, prepare in variants.items():
+        correct, prepare_ms, ocr_ms = evaluate(engine, banners, prepare)
+        print(f"{name:<22} {correct:>4}/{len(banners):<4} {prepare_ms:>8.2f} {ocr_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# The old perf_counter busy loop against PrecisionTimer on recording-like gaps, with a Python thread
+# standing in for the detectors to show how much of the GIL each leaves them
+# Run from the repo root: python -m benchmarks.replay_timer [--actions 200] [--spin-ms 0.8]
+import argparse, os, random, sys, threading, time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.precision_timer import PrecisionTimer
+
+
+def busy_wait(deadline, should_stop=None):
+    # replay_actions before PrecisionTimer
+    while time.perf_counter() < deadline:
+        if should_stop and should_stop():
+            return False
+    return True
+
+
+def detector_work(stop, counter):
+    # Pure Python work that needs the GIL, counts how many rounds it got through
+    while not stop.is_set():
+        sum(range(2000))
+        counter[0] += 1
+
+
+def run(wait_until, gaps):
+    stop, counter = threading.Event(), [0]
+    worker = threading.Thread(target=detector_work, args=(stop, counter), daemon=True)
+    worker.start()
+
+    lateness = []
+    cpu_start = time.thread_time()
+    start = time.perf_counter()
+    deadline = start
+    for gap in gaps:
+        deadline += gap
+        wait_until(deadline, lambda: False)
+        lateness.append(time.perf_counter() - deadline)
+    elapsed = time.perf_counter() - start
+    cpu = time.thread_time() - cpu_start
+
+    stop.set()
+    worker.join()
+    lateness.sort()
+    return {
+        "mean_ms": sum(lateness) / len(lateness) * 1000,
+        "p99_ms": lateness[int(len(lateness) * 0.99) - 1] * 1000,
+        "max_ms": lateness[-1] * 1000,
+        "cpu": cpu / elapsed,
+        "detector_rounds": counter[0] / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the replay wait between actions.")
+    parser.add_argument("--actions", type=int, default=200)
+    parser.add_argument("--spin-ms", type=float, default=0.8)
+    args = parser.parse_args()
+
+    random.seed(1)
+    # Key presses and releases of a walk, 10-100 ms apart
+    gaps = [random.uniform(0.01, 0.1) for _ in range(args.actions)]
+    timer = PrecisionTimer(spin_threshold=args.spin_ms / 1000)
+
+    results = [("busy loop", run(busy_wait, gaps)), ("PrecisionTimer", run(timer.wait_until, gaps))]
+    print(f"{'wait':<15} {'mean ms':>8} {'p99 ms':>8} {'max ms':>8} {'CPU':>6} {'detector/s':>11}")
+    for name, result in results:
+        print(f"{name:<15} {result['mean_ms']:>8.3f} {result['p99_ms']:>8.3f} {result['max_ms']:>8.3f} "
+              f"{result['cpu']:>6.0%} {result['detector_rounds']:>11.0f}")
+    print(timer.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Compare full resolution star matching with the coarse-to-fine pyramid mode of StarMatcher
+# Run from the repo root: python -m benchmarks.star_pyramid --width 2560 --height 1440 --scales 0.5 0.25
+# --roi 0.25 0 0.5 1 matches only inside that [left, top, width, height] fraction of the frame, like StarSearchRegion
+import argparse, os, sys, time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.star_matcher import StarMatcher
+
+
+# Noisy desktop-like frame, with a jittered star pasted on a black patch when star_ref is given
+def make_frame(width, height, rng, star_ref=None, star_type=None, roi=None):
+    frame = rng.integers(20, 200, (height // 8, width // 8, 3), dtype=np.uint8)
+    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_NEAREST)
+    frame = cv2.GaussianBlur(frame, (5, 5), 0)
+    if star_ref is None:
+        return frame, None
+
+    h, w = star_ref.shape
+    left, top, right, bottom = 0, 0, width, height
+    if roi:
+        left, top, right, bottom = roi[0], roi[1], roi[0] + roi[2], roi[1] + roi[3]
+    x = int(rng.integers(left + 20, right - w - 20))
+    y = int(rng.integers(top + 20, bottom - h - 20))
+    frame[y - 20:y + h + 20, x - 20:x + w + 20] = 0
+
+    star = star_ref.astype(np.int16) + rng.integers(-8, 9, star_ref.shape)
+    star = np.clip(star * rng.uniform(0.9, 1.1), 0, 255).astype(np.uint8)
+    frame[y:y + h, x:x + w] = cv2.cvtColor(star, cv2.COLOR_GRAY2BGR)
+    return frame, (x, y, w, h, star_type)
+
+
+# Right star type and a box overlapping the planted star, the match plateau is wide on these templates
+def is_hit(result, expected, min_iou=0.5):
+    bbox, star_type = result
+    if expected is None:
+        return bbox is None
+    if bbox is None or star_type != expected[4]:
+        return False
+
+    x, y, w, h = bbox
+    ex, ey, ew, eh, _ = expected
+    inter_w = max(0, min(x + w, ex + ew) - max(x, ex))
+    inter_h = max(0, min(y + h, ey + eh) - max(y, ey))
+    inter = inter_w * inter_h
+    return inter / (w * h + ew * eh - inter) >= min_iou
+
+
+def run(matcher, frames, roi=None):
+    latencies = []
+    hits = 0
+    for frame, expected in frames:
+        matcher.ignored_4_corner_count = 0
+        start = time.perf_counter()
+        result = matcher.detect(frame, roi)
+        latencies.append(time.perf_counter() - start)
+        hits += is_hit(result, expected)
+    return np.array(latencies), hits / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.5, 0.25])
+    parser.add_argument("--roi", type=float, nargs=4, default=None)
+    args = parser.parse_args()
+
+    roi = None
+    if args.roi:
+        left, top, width, height = args.roi
+        roi = (int(args.width * left), int(args.height * top), int(args.width * width), int(args.height * height))
+
+    rng = np.random.default_rng(0)
+    matcher = StarMatcher()
+    refs = [(ref, "4_corners") for ref in matcher.star_ref_4_corner] + [(ref, "8_corners") for ref in matcher.star_refs_8_corner]
+    frames = []
+    for index in range(args.frames):
+        # Every fourth frame has no star, to count false positives
+        if index % 4 == 3:
+            frames.append(make_frame(args.width, args.height, rng))
+        else:
+            frames.append(make_frame(args.width, args.height, rng, *refs[index % len(refs)], roi))
+
+    print(f"{args.frames} frames at {args.width}x{args.height}" + (f", roi {roi}" if roi else ""))
+    print(f"{'scale':>6} {'mean ms':>9} {'p95 ms':>9} {'hit rate':>9}")
+    for scale in [1.0] + args.scales:
+        matcher.set_pyramid_scale(scale)
+        latencies, hit_rate = run(matcher, frames, roi)
+        print(f"{scale:>6} {latencies.mean() * 1000:>9.1f} {np.percentile(latencies, 95) * 1000:>9.1f} {hit_rate:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
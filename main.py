@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import re, os, sys, json, threading, webbrowser, requests
+import re, os, sys, copy, json, threading, webbrowser, requests
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import threading
 
@@ -35,6 +35,8 @@ from modules.record_path import RecordPath
 from modules.snipping import SnippingWidget
 from modules.main_loop import MacroLoop
 from modules.discord_bot import start_bot
+from modules.config_store import get_config_store
+from modules.path_index import get_path_index
         
 class DiscordMacroUI:
     def __init__(self, root):
@@ -66,7 +68,10 @@ class DiscordMacroUI:
         
         #config and config path
         self.config_path = os.path.expandvars("%appdata%/DSIM/config.json")
+        # The UI edits its own copy, saves go through the store shared with the loop, detectors and bot
+        self.config_store = get_config_store(self.config_path)
         self.config = self.load_config()
+        self.config_store.subscribe(self.on_config_changed)
 
         if not os.path.exists(os.path.expandvars("%appdata%/DSIM/")):
             os.makedirs(os.path.expandvars("%appdata%/DSIM/"))
@@ -115,21 +120,41 @@ class DiscordMacroUI:
            
     def load_config(self):
         try:
-            with open(self.config_path, "r") as file:
-                return json.load(file)
+            return copy.deepcopy(self.config_store.snapshot())
         except FileNotFoundError:
             return {}
 
+    def on_config_changed(self, config, changed):
+        # Keys saved by the bot, snipping tool or a text editor, so the next UI save doesn't revert them.
+        # The store calls this from whichever thread noticed the change, self.config belongs to the Tk thread
+        if threading.current_thread() is threading.main_thread():
+            self.apply_config_changes(changed)
+            return
+        try:
+            self.root.after(0, self.apply_config_changes, changed)
+        except (RuntimeError, tk.TclError):
+            # The window is already gone
+            pass
+
+    def apply_config_changes(self, changed):
+        # Read when applied, not when scheduled, so a later change never gets overwritten by an older one
+        config = self.config_store.data
+        for key in changed:
+            if key in config:
+                self.config[key] = copy.deepcopy(config[key])
+            else:
+                self.config.pop(key, None)
+
     def update_config(self, key, value, default=None):
         if key not in self.config:
             self.config[key] = value if default is None else default
         else:
             self.config[key] = value
-        self.save_config()
+        self.save_config([key])
 
-    def save_config(self):
-        with open(self.config_path, "w") as file:
-            json.dump(self.config, file, indent=4)
+    def save_config(self, keys):
+        # Only the keys the UI just changed, the rest of self.config may be behind a change made by another thread
+        self.config_store.update({key: self.config[key] for key in keys if key in self.config})
 
     def update_item_spot(self, index, var):
         item_spots = self.config.get("Sub_ItemSpot", [0] * 8)
@@ -147,7 +172,7 @@ class DiscordMacroUI:
             with open(file_path, "r") as file:
                 imported_config = json.load(file)
             self.config.update(imported_config)
-            self.save_config()
+            self.save_config(imported_config.keys())
 
             self.system_message("Settings imported successfully! Please restart the macro to take effect :3")
         except Exception as e:
@@ -202,8 +227,7 @@ class DiscordMacroUI:
         self.config["Equipped_Aura"] = aura_name
         self.config["Special_Aura"] = is_special
 
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "w") as config_file:
-            json.dump(self.config, config_file, indent=4)
+        self.save_config(["Equipped_Aura", "Special_Aura"])
 
         for widget in self.root.winfo_children():
             if isinstance(widget, tk.Toplevel):
@@ -215,18 +239,16 @@ class DiscordMacroUI:
     
     def load_from_json(self):
         try:
-            with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as file:
-                data = json.load(file)
-                self.scheduler_entries = data.get("item_scheduler", [])
-                
-                for entry in self.scheduler_entries:
-                    entry.setdefault("item", self.available_items[0])
-                    entry.setdefault("quantity", 1)
-                    entry.setdefault("frequency", 1)
-                    entry.setdefault("frequency_unit", "Minutes")
-                    entry.setdefault("biome", "Any")
-
-        except (FileNotFoundError, json.JSONDecodeError):
+            self.scheduler_entries = copy.deepcopy(self.config_store.snapshot().get("item_scheduler", []))
+            
+            for entry in self.scheduler_entries:
+                entry.setdefault("item", self.available_items[0])
+                entry.setdefault("quantity", 1)
+                entry.setdefault("frequency", 1)
+                entry.setdefault("frequency_unit", "Minutes")
+                entry.setdefault("biome", "Any")
+
+        except FileNotFoundError:
             self.scheduler_entries = [
                 {"item": self.available_items[0], "quantity": 1, "frequency": 1, "frequency_unit": "Minutes", "biome": "Any"}
             ]
@@ -235,17 +257,7 @@ class DiscordMacroUI:
 
     def save_to_json(self):
         try:
-            try:
-                with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as file:
-                    data = json.load(file)
-            except (FileNotFoundError, json.JSONDecodeError):
-                data = {}
-
-            data["item_scheduler"] = self.scheduler_entries
-
-            with open(os.path.expandvars("%appdata%/DSIM/config.json"), "w") as file:
-                json.dump(data, file, indent=4)
-
+            self.config_store.set("item_scheduler", self.scheduler_entries)
         except Exception as e:
             print(f"Error saving to config.json: {e}")
 
@@ -286,8 +298,7 @@ class DiscordMacroUI:
             link = self.server_link_var.get()
             if self.is_valid_ps_link(link):
                 self.config["PrivateServerLink"] = link
-                with open(self.config_path, "w") as config_file:
-                    json.dump(self.config, config_file, indent=4)
+                self.save_config(["PrivateServerLink"])
                 self.status_label.config(text="Link saved successfully!", foreground="green")
             else:
                 self.status_label.config(text="Invalid link format. Please correct it.", foreground="red")
@@ -551,7 +562,7 @@ class DiscordMacroUI:
                 selections[item_name] = amount_var.get()
 
         self.config["Mari_AutoBuyItems"] = selections
-        self.save_config()
+        self.save_config(["Mari_AutoBuyItems"])
         
         print("Mari Autobuy Items saved:", selections)
         
@@ -595,7 +606,7 @@ class DiscordMacroUI:
                 selections[item_name] = amount_var.get()
 
         self.config["Jester_AutoBuyItems"] = selections
-        self.save_config()
+        self.save_config(["Jester_AutoBuyItems"])
         
         print("Jester Autobuy Items saved:", selections)
         
@@ -780,7 +791,7 @@ class DiscordMacroUI:
         for config_key, (x_var, y_var) in self.coord_vars.items():
             self.config[config_key] = [x_var.get(), y_var.get()]
 
-        self.save_config()
+        self.save_config(self.coord_vars.keys())
         self.assign_menu_window.destroy()
         
     def save_merchant_coordinates(self, window):
@@ -792,7 +803,7 @@ class DiscordMacroUI:
                 x_var, y_var = vars
                 self.config[config_key] = [x_var.get(), y_var.get()]
 
-        self.save_config()
+        self.save_config(self.coord_vars.keys())
         window.destroy()
 
     
@@ -873,12 +884,6 @@ class DiscordMacroUI:
 
     
     BASE_PATH = os.path.join(os.path.dirname(__file__), 'MAIN_PATHS')
-    
-    def find_file(self, base_path, filename):
-        for root, _, files in os.walk(base_path):
-            if filename in files:
-                return os.path.join(root, filename)
-        return None
 
     def bind_record_keys(self, path_num):
         if self.listener:
@@ -930,21 +935,18 @@ class DiscordMacroUI:
         replay_start_key = key_bindings['replay_start']
         replay_stop_key = key_bindings['replay_stop']
 
+        path_index = get_path_index(self.BASE_PATH)
         if path_num in ["misc_obby", "misc_potion"]:
-            folder_name = "EON1_Misc"
             label = "Obby Path" if path_num == "misc_obby" else "Potion Path"
+            file_path = path_index.misc(path_num[len("misc_"):])
         else:
             path_num = int(path_num)
             sub_path_index = (path_num - 1) // 5 + 1
-            folder_name = f"EON1_SubPath{sub_path_index}"
             label = f"Path {path_num}"
+            file_path = path_index.subpath(sub_path_index, path_num)
 
-        directory_path = os.path.join(self.BASE_PATH, folder_name)
-        expected_filename = f"{label.lower().replace(' ', '_')}_record.json"
-        file_path = os.path.join(directory_path, expected_filename)
-
-        if not os.path.exists(file_path):
-            file_path = self.find_file(self.BASE_PATH, expected_filename)
+        if not file_path:
+            file_path = path_index.find(f"{label.lower().replace(' ', '_')}_record.json")
             if not file_path:
                 self.system_message(f"No recording found for {label}")
                 return
@@ -1702,4 +1704,5 @@ class DiscordMacroUI:
 if __name__ == "__main__":
     root = tk.Tk()
     app = DiscordMacroUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.config_store.flush()
\ No newline at end of file
@@ -0,0 +1,163 @@
+import hashlib, json, os, threading, time
+import requests
+
+AURAS_URL = "https://gist.enzomtp.party/enzomtp/e93e43c689aa4c7aba469376517ec691/raw/HEAD/auras.json"
+BUNDLED_PATH = os.path.join(os.path.dirname(__file__), "auras.json")
+
+
+def content_hash(auras):
+    # Stable over key order and whitespace, so a re-served but identical catalog isn't a change
+    return hashlib.sha256(json.dumps(auras, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class AuraCatalog:
+    # Aura catalog that loads from disk instantly and refreshes from the gist in the background
+    # Cache is %appdata%/DSIM/auras.json next to a small file holding the ETag, Last-Modified and last check time
+    def __init__(self, url=AURAS_URL, cache_path=None, bundled_path=BUNDLED_PATH, refresh_interval=3600):
+        if cache_path is None:
+            cache_path = os.path.expandvars("%appdata%/DSIM/auras.json")
+        self.url = url
+        self.cache_path = cache_path
+        self.meta_path = os.path.splitext(cache_path)[0] + "_meta.json"
+        self.bundled_path = bundled_path
+        # Don't even ask the server again if the cache was checked this recently (seconds)
+        self.refresh_interval = refresh_interval
+
+        self.lock = threading.Lock()
+        self.subscribers = []
+        self.refresh_thread = None
+        self.meta = self.read_json(self.meta_path) or {}
+
+        self.auras = self.read_json(self.cache_path)
+        self.source = "cache"
+        if not isinstance(self.auras, dict):
+            self.auras = self.read_json(self.bundled_path)
+            self.source = "bundled"
+        if not isinstance(self.auras, dict):
+            # Nothing on disk at all, wait for the gist like before the catalog was cached
+            self.auras = self.download()
+        if not isinstance(self.auras, dict):
+            raise Exception("No aura catalog available, modules/auras.json is missing and the download failed.")
+        self.hash = content_hash(self.auras)
+
+    def read_json(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def download(self):
+        # Blocking fetch for when there is no copy to start from, stored as the cache when possible
+        try:
+            response = requests.get(self.url, timeout=15)
+            response.raise_for_status()
+            auras = response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"Could not download the aura catalog: {e}")
+            return None
+        self.source = "download"
+        try:
+            self.write_json(self.cache_path, auras)
+            self.save_meta(response)
+            self.source = "cache"
+        except OSError as e:
+            print(f"Could not write the aura catalog cache: {e}")
+        return auras
+
+    def write_json(self, path, data):
+        # Written next to the target then renamed over it, a crash never leaves half a file
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp_path, path)
+
+    def get(self):
+        # A fresh copy, callers are free to mutate it (AuraDetector turns colors into arrays)
+        with self.lock:
+            return json.loads(json.dumps(self.auras)), self.hash
+
+    def subscribe(self, callback):
+        # callback(auras, hash) runs on the refresh thread whenever the catalog content changes
+        self.subscribers.append(callback)
+
+    def refresh_due(self):
+        if self.source != "cache":
+            return True
+        return time.time() - self.meta.get("checked", 0) >= self.refresh_interval
+
+    def refresh_in_background(self, force=False):
+        if not force and not self.refresh_due():
+            return None
+        if self.refresh_thread is None or not self.refresh_thread.is_alive():
+            self.refresh_thread = threading.Thread(target=self.refresh, name="AuraCatalogRefresh", daemon=True)
+            self.refresh_thread.start()
+        return self.refresh_thread
+
+    def refresh(self):
+        # Conditional GET, returns True if the catalog changed
+        headers = {}
+        if self.source == "cache":
+            if self.meta.get("etag"):
+                headers["If-None-Match"] = self.meta["etag"]
+            if self.meta.get("last_modified"):
+                headers["If-Modified-Since"] = self.meta["last_modified"]
+
+        try:
+            response = requests.get(self.url, headers=headers, timeout=15)
+        except requests.RequestException as e:
+            print(f"Could not refresh the aura catalog, keeping the {self.source} copy: {e}")
+            return False
+
+        if response.status_code == 304:
+            try:
+                self.save_meta(response)
+            except OSError as e:
+                print(f"Could not write the aura catalog cache: {e}")
+            return False
+        if response.status_code != 200:
+            print(f"Could not refresh the aura catalog (HTTP {response.status_code}), keeping the {self.source} copy.")
+            return False
+
+        try:
+            auras = response.json()
+        except ValueError:
+            print("Downloaded aura catalog is not valid JSON, keeping the current one.")
+            return False
+
+        new_hash = content_hash(auras)
+        changed = new_hash != self.hash
+        source = "cache"
+        try:
+            if changed or self.source != "cache":
+                self.write_json(self.cache_path, auras)
+            self.save_meta(response)
+        except OSError as e:
+            print(f"Could not write the aura catalog cache: {e}")
+            source = "download"
+
+        if not changed:
+            self.source = source
+            return False
+
+        with self.lock:
+            self.auras = auras
+            self.hash = new_hash
+            self.source = source
+        print("Aura catalog updated.")
+
+        for callback in self.subscribers:
+            try:
+                callback(*self.get())
+            except Exception as e:
+                print(f"Error applying the new aura catalog: {e}")
+        return True
+
+    def save_meta(self, response):
+        self.meta = {
+            "etag": response.headers.get("ETag", self.meta.get("etag")),
+            "last_modified": response.headers.get("Last-Modified", self.meta.get("last_modified")),
+            "checked": time.time(),
+        }
+        self.write_json(self.meta_path, self.meta)
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+# Which rarity groups of auras.json can show up under each star shape
+STAR_GROUPS = {
+    "8_corners": ("1m+", "10m+", "100m+"),
+    "4_corners": ("10k+",),
+}
+
+
+class AuraClassifier:
+    # Precomputed per star type color tables, so a detection scores the whole catalog in one pass
+    def __init__(self, auras):
+        self.tables = {}
+        for star_type, groups in STAR_GROUPS.items():
+            merged = {}
+            for group in groups:
+                merged |= auras.get(group, {})
+            self.tables[star_type] = self.build_table(merged)
+
+    def build_table(self, aura_group):
+        names = list(aura_group.keys())
+        infos = list(aura_group.values())
+        if not names:
+            return {
+                "names": names,
+                "infos": infos,
+                "rgb": np.empty((0, 3), dtype=np.int64),
+                "hsv": np.empty((0, 3), dtype=np.int64),
+                "tolerance": np.empty(0, dtype=np.float64),
+            }
+
+        rgb = np.array([info["color"] for info in infos], dtype=np.int64).reshape(-1, 3)
+        hsv = cv2.cvtColor(rgb.astype(np.uint8).reshape(1, -1, 3), cv2.COLOR_RGB2HSV)[0].astype(np.int64)
+        tolerance = np.array([info["tolerance"] for info in infos], dtype=np.float64)
+        return {"names": names, "infos": infos, "rgb": rgb, "hsv": hsv, "tolerance": tolerance}
+
+    def score(self, center_color, star_type):
+        # Returns (rgb distances, hsv distances) for every aura of the star type
+        table = self.tables[star_type]
+        center = np.asarray(center_color, dtype=np.int64)
+        detected_hsv = cv2.cvtColor(center.astype(np.uint8).reshape(1, 1, 3), cv2.COLOR_RGB2HSV)[0][0].astype(np.int64)
+
+        diff = table["rgb"] - center
+        distance_rgb = np.sqrt(np.sum(diff * diff, axis=1))
+
+        delta = np.abs(table["hsv"] - detected_hsv)
+        dh = np.minimum(delta[:, 0], 180 - delta[:, 0]) / 180.0
+        ds = delta[:, 1] / 255.0
+        dv = delta[:, 2] / 255.0
+        distance_hsv = np.sqrt(dh**2 + ds**2 + dv**2) * 255
+        return distance_rgb, distance_hsv
+
+    def classify(self, center_color, star_type):
+        table = self.tables.get(star_type)
+        if table is None or not table["names"]:
+            return None
+
+        distance_rgb, distance_hsv = self.score(center_color, star_type)
+        tolerance = table["tolerance"]
+        candidates = (distance_rgb < tolerance) & (distance_hsv < tolerance)
+        if not candidates.any():
+            return None
+
+        # argmin keeps the first aura on ties, same as the old strict "<" loop
+        best = int(np.argmin(np.where(candidates, distance_hsv, np.inf)))
+        return table["names"][best], table["infos"][best]
@@ -1,55 +1,84 @@
-import requests, cv2, time, os, json, pyautogui, pygetwindow
+import cv2, time, os
 import numpy as np
-from PIL import ImageGrab
+from modules.aura_catalog import AuraCatalog
+from modules.aura_classifier import AuraClassifier
+from modules.star_matcher import StarMatcher
+from modules.frame_gate import FrameChangeGate
+from modules.frame_source import FrameSource
+from modules.webhook_queue import WebhookQueue
+from modules.image_pipeline import encode_image, image_file, archive_image
+from modules.config_store import get_config_store
 
 class AuraDetector:
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, frame_source=None, capture_backend=None, auras=None):
             
-        if config_path is None:
-            config_path = os.path.expandvars("%appdata%/DSIM/config.json")
+        self.config = get_config_store(config_path)
         
-        response = requests.get("https://gist.enzomtp.party/enzomtp/e93e43c689aa4c7aba469376517ec691/raw/HEAD/auras.json")
-        if response.status_code == 200:
-            self.auras = response.json()
-        else:
-            raise Exception("Failed to load auras configuration from the provided URL.")
-            
-        with open(config_path, "r") as config_file:
-            config = json.load(config_file)
-            self.webhook_url = config.get("WebhookLink")
-            self.webhook_userid = config.get("WebhookUserID")
-            self.roll_ping_minimum = config.get("WebhookRollPingMinimum", 100000)
-            self.roll_send_minimum = config.get("WebhookRollSendMinimum", 10000)
+        # Start from the cached (or bundled) catalog, a newer one from the gist is swapped in when it arrives
+        self.catalog = None
+        if auras is None:
+            self.catalog = AuraCatalog()
+            auras, _ = self.catalog.get()
+
+        config = self.config.snapshot()
+        self.apply_config(config)
+        self.star_pyramid_scale = config.get("StarPyramidScale", 1)
+        self.frame_change_threshold = config.get("FrameChangeThreshold", 2.0)
+        self.webhook_queue_size = config.get("WebhookQueueSize", 8)
+        self.webhook_queue_policy = config.get("WebhookQueuePolicy", "merge")
+        # Webhook settings and the search area follow config.json edits without a restart
+        self.config.subscribe(self.apply_config)
+
+        self.apply_catalog(auras)
+        if self.catalog is not None:
+            self.catalog.subscribe(self.apply_catalog)
+            self.catalog.refresh_in_background()
+
+        # Star shape matching, StarPyramidScale < 1 enables coarse-to-fine matching
+        self.star_matcher = StarMatcher(pyramid_scale=self.star_pyramid_scale, color_order="RGB")
+
+        # Skip star matching while the search region is unchanged since the last matched frame
+        self.frame_gate = FrameChangeGate(threshold=self.frame_change_threshold)
+
+        # Frames come in RGB from the shared capture, MacroLoop passes its own so every detector reuses the same grab
+        self.frame_source = frame_source if frame_source is not None else FrameSource(capture_backend)
+
+        # Webhooks are posted from a background thread, detection only encodes the screenshot and moves on
+        self.webhook_queue = WebhookQueue(self.webhook_queue_size, self.webhook_queue_policy)
 
+        self.previous_aura_name = None
+        self.last_detection_time = 0
+        # Seconds spent in each stage of the last find_aura call
+        self.stage_times = {}
+        
+    def apply_config(self, config, changed=None):
+        self.webhook_url = config.get("WebhookLink")
+        self.webhook_userid = config.get("WebhookUserID")
+        self.roll_ping_minimum = config.get("WebhookRollPingMinimum", 100000)
+        self.roll_send_minimum = config.get("WebhookRollSendMinimum", 10000)
+        # Star search area as [left, top, width, height] fractions of the Roblox client
+        self.star_search_region = config.get("StarSearchRegion", [0, 0, 1, 1])
+
+    def apply_catalog(self, auras, catalog_hash=None):
+        # The catalog only calls back when its content hash changed, so the tables are rebuilt only then
         # Convert colors to numpy for easier detect
-        for rarity in self.auras.values():
+        for rarity in auras.values():
             for aura in rarity.values():
                 aura["color"] = np.array(aura["color"])
 
-        # Load star shape reference images
-        images_dir = os.path.join(os.path.dirname(__file__), "../images/Stars_Ref")
-        self.star_ref_4_corner = [
-            cv2.imread(os.path.join(images_dir, "4_corner_star.png"), cv2.IMREAD_GRAYSCALE),
-            cv2.imread(os.path.join(images_dir, "4_corner_star_2.png"), cv2.IMREAD_GRAYSCALE)
-        ]
-        
-        self.star_refs_8_corner = [
-            cv2.imread(os.path.join(images_dir, "8_corner_star.png"), cv2.IMREAD_GRAYSCALE),
-            cv2.imread(os.path.join(images_dir, "8_corner_star_2.png"), cv2.IMREAD_GRAYSCALE)
-        ]
-
-        if any(ref is None for ref in self.star_ref_4_corner) or any(ref is None for ref in self.star_refs_8_corner):
-            raise FileNotFoundError("Star reference images not found in 'images/Stars_Ref' folder. Try putting your own star as reference.")
+        classifier = AuraClassifier(auras)
+        # Single assignments, a detection running meanwhile sees either the old or the new catalog
+        self.auras = auras
+        self.classifier = classifier
 
-        self.previous_aura_name = None
-        self.last_detection_time = 0
-        self.ignored_4_corner_count = 0
-        self.max_ignored_threshold = 2
-        
     def rgb_to_hex(self, rgb):
         return int("{:02x}{:02x}{:02x}".format(rgb[0], rgb[1], rgb[2]), 16)
         
-    def send_webhook(self, aura_name, rarity_value, image_path, rgb_color=None, aura_img=None):
+    def send_webhook(self, aura_name, rarity_value, image_name, image_data, rgb_color=None, aura_img=None):
+        if not self.webhook_url:
+            print(f"Webhook for {aura_name} not sent, no webhook link is configured.")
+            return
+
         if rgb_color is None:
             # color: 0x5B4E9F
             rgb_color = [91, 78, 159]  # Fallback 
@@ -62,7 +91,7 @@ class AuraDetector:
             "description": f"** 1/{rarity_value} **",
             "color": self.rgb_to_hex(rgb_color),
             "image": {"url": aura_img},
-            "thumbnail": {"url": f"attachment://{os.path.basename(image_path)}"},
+            "thumbnail": {"url": f"attachment://{image_name}"},
         }
 
         # Determine whether to ping based on rarity
@@ -70,90 +99,30 @@ class AuraDetector:
         if rarity_value >= self.roll_ping_minimum and self.webhook_userid != '':
             content = f"<@{self.webhook_userid}>"
 
-        with open(image_path, "rb") as f:
-            files = {"file": (os.path.basename(image_path), f, "image/png")}
-            payload = {"embeds": [embed]}
-            if content:
-                payload["content"] = content
-
-            response = requests.post(self.webhook_url, data={"payload_json": json.dumps(payload)}, files=files)
-            if response.status_code != 204 and response.status_code != 200:
-                print(f"Error: {response.text}")
-            else:
-                print("Webhook sent successfully.")
+        payload = {"embeds": [embed]}
+        if content:
+            payload["content"] = content
+
+        # A newer roll of the same aura still waiting in the queue is replaced rather than sent twice
+        queued = self.webhook_queue.submit(
+            self.webhook_url, payload,
+            files=[image_file(image_name, image_data)],
+            key=aura_name,
+            on_sent=lambda: print("Webhook sent successfully."),
+        )
+        if not queued:
+            reason = "delivery queue is closed" if self.webhook_queue.closed else "delivery queue is full"
+            print(f"Webhook for {aura_name} dropped, {reason}.")
 
-    def rgb_distance(self, color1, color2):
-        return np.linalg.norm(np.array(color1) - np.array(color2))
-
-    def hsv_distance(self, hsv1, hsv2):
-        hsv1 = hsv1.astype(int)
-        hsv2 = hsv2.astype(int)
-
-        dh = min(abs(hsv1[0] - hsv2[0]), 180 - abs(hsv1[0] - hsv2[0])) / 180.0
-        ds = abs(hsv1[1] - hsv2[1]) / 255.0
-        dv = abs(hsv1[2] - hsv2[2]) / 255.0
-        return np.sqrt(dh**2 + ds**2 + dv**2) * 255
+    def is_pure_black_background(self, image, bbox):
+        return self.star_matcher.is_pure_black_background(image, bbox)
 
+    def detect_star_shape(self, image, roi=None):
+        return self.star_matcher.detect(image, roi)
 
-    def is_pure_black_background(self, image, bbox):
-        x, y, w, h = bbox
-        tolerance = 5 
-        corners = [
-            image[y, x - 10],  
-            image[y, x + w - 10],
-            image[y + h - 10, x],  
-            image[y + h - 10, x + w - 10]
-        ]
-        for corner in corners:
-            if not np.all(corner < tolerance):
-                return False
-        return True
-
-    def detect_star_shape(self, image):
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Detect 4-corner star
-        max_confidence_4 = 0
-        best_4_corner_bbox = None
-        for star_ref in self.star_ref_4_corner:
-            res_4_corner = cv2.matchTemplate(gray, star_ref, cv2.TM_CCOEFF_NORMED)
-            loc_4 = np.where(res_4_corner >= 0.75)
-            confidence_4 = np.max(res_4_corner) if len(loc_4[0]) > 0 else 0
-
-            if confidence_4 > max_confidence_4:
-                max_confidence_4 = confidence_4
-                for pt in zip(*loc_4[::-1]):
-                    bbox = (pt[0], pt[1], star_ref.shape[1], star_ref.shape[0])
-                    if self.is_pure_black_background(image, bbox):
-                        self.ignored_4_corner_count = 0
-                        best_4_corner_bbox = bbox
-                        break
-                else:
-                    self.ignored_4_corner_count += 1
-
-        # Detect 8-corner star
-        max_confidence_8 = 0
-        best_8_corner_bbox = None
-        for star_ref in self.star_refs_8_corner:
-            res_8_corner = cv2.matchTemplate(gray, star_ref, cv2.TM_CCOEFF_NORMED)
-            loc_8 = np.where(res_8_corner >= 0.75)
-            confidence_8 = np.max(res_8_corner) if len(loc_8[0]) > 0 else 0
-
-            if confidence_8 > max_confidence_8:
-                max_confidence_8 = confidence_8
-                for pt in zip(*loc_8[::-1]):
-                    best_8_corner_bbox = (pt[0], pt[1], star_ref.shape[1], star_ref.shape[0])
-
-        if self.ignored_4_corner_count >= self.max_ignored_threshold:
-            if max_confidence_8 >= 0.75:
-                return best_8_corner_bbox, "8_corners"
-            return None, None
-
-        if max_confidence_8 > max_confidence_4 and max_confidence_8 >= 0.75:
-            return best_8_corner_bbox, "8_corners"
-        elif max_confidence_4 >= 0.75 and best_4_corner_bbox is not None:
-            return best_4_corner_bbox, "4_corners"
-        return None, None
+    def get_star_search_region(self, rX, rY, rW, rH):
+        left, top, width, height = self.star_search_region
+        return int(rX + rW * left), int(rY + rH * top), int(rW * width), int(rH * height)
 
     def adjust_brightness(self, image, factor=1):
         hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
@@ -162,6 +131,13 @@ class AuraDetector:
 
     # Get the Roblox window size and return rX as roblox window position, rY as roblox window position and rW as roblox window width, rH as roblox window height
     def getRobloxWindowSize(self):
+        # Replayed frames already are the client, no window to look up
+        rect = self.frame_source.window_rect()
+        if rect:
+            return rect
+
+        # Imported here so the detector also loads on Linux with a replay backend
+        import pyautogui, pygetwindow
         window_list = pyautogui.getAllTitles()
         for window in window_list:
             if "Roblox" in window:
@@ -174,7 +150,11 @@ class AuraDetector:
     def isColorWhite(self, color):
         return color[0] > 175 and color[1] > 175 and color[2] > 175
 
-    def detect_aura(self, image):
+    def find_aura(self, image):
+        # Star + color matching without side effects, returns (star_type, (aura_name, aura_info) or None) or None without a star
+        self.stage_times = {}
+        stage_start = time.perf_counter()
+
         rX, rY, rW, rH = self.getRobloxWindowSize()
         scanPoints = [[rX+1,rY+31],[rX+rW-2,rY+31],[rX+1,rY+rH-2],[rX+rW-2,rY+rH-2]]
         blackCorners = 0
@@ -189,71 +169,72 @@ class AuraDetector:
                 whiteCorners += 1
             cornerResults.append(pColor)
 
-        current_time = time.time()
-        if current_time - self.last_detection_time < 15:
+        star_region = self.get_star_search_region(rX, rY, rW, rH)
+        region_view, _, _ = self.star_matcher.crop_region(image, star_region)
+        should_run = region_view.size > 0 and self.frame_gate.should_run(region_view)
+        self.stage_times["gate"] = time.perf_counter() - stage_start
+        if not should_run:
             return None
 
-        star_bbox, star_type = self.detect_star_shape(image)
+        stage_start = time.perf_counter()
+        star_bbox, star_type = self.detect_star_shape(image, star_region)
+        self.stage_times["star_match"] = time.perf_counter() - stage_start
         if not ((blackCorners >= 4 and star_bbox) or (star_bbox and self.isColorBlack(cornerResults[0]) and self.isColorBlack(cornerResults[1]) and not self.isColorWhite(cornerResults[2]))):
             return None
 
+        stage_start = time.perf_counter()
         x, y, w, h = star_bbox
         center_x, center_y = x + w // 2, y + h // 2
         
-        screenshot = ImageGrab.grab()
-        colors = [
-            screenshot.getpixel((center_x + dx, center_y + dy))
-            for dx in range(-1, 2) for dy in range(-1, 2)
-        ]
+        colors = image[center_y - 1:center_y + 2, center_x - 1:center_x + 2].reshape(-1, 3)
         center_color = np.mean(colors, axis=0).astype(int)
 
-        detected_hsv = cv2.cvtColor(np.uint8([[center_color]]), cv2.COLOR_RGB2HSV)[0][0]
-
-        # Get the aura group based on star type
-        aura_group = (self.auras["1m+"] | self.auras["10m+"] | self.auras["100m+"]) if star_type == "8_corners" else self.auras["10k+"]
-        best_aura = None
-        min_distance = float('inf')
+        best_aura = self.classifier.classify(center_color, star_type)
+        self.stage_times["classify"] = time.perf_counter() - stage_start
+        return star_type, best_aura
 
-        for aura_name, aura_info in aura_group.items():
-            aura_rgb = aura_info["color"]
-            tolerance = aura_info["tolerance"]
-
-            distance_rgb = self.rgb_distance(center_color, aura_rgb)
-            if distance_rgb < tolerance:
-                aura_hsv = cv2.cvtColor(np.uint8([[aura_rgb]]), cv2.COLOR_RGB2HSV)[0][0]
-                distance_hsv = self.hsv_distance(detected_hsv, aura_hsv)
+    def detect_aura(self, image):
+        current_time = time.time()
+        if current_time - self.last_detection_time < 15:
+            return None
 
-                if distance_hsv < tolerance and distance_hsv < min_distance:
-                    min_distance = distance_hsv
-                    best_aura = (aura_name, aura_info)
+        result = self.find_aura(image)
+        if result is None:
+            return None
 
+        star_type, best_aura = result
         if best_aura and best_aura[0] != self.previous_aura_name:
             aura_name, aura_info = best_aura
             rarity_value = int(aura_info.get("rarity", 0))
 
-            # Save the detected aura image
-            filename = self.save_image(image, aura_name, star_type)
+            # Encode the screenshot once, it's both saved and uploaded
+            image_data = self.encode_image(image)
+            filename = self.save_image(image_data, aura_name, star_type)
 
-            # Send a webhook notification
-            self.send_webhook(aura_name, rarity_value, filename, aura_info["color"], aura_info.get("image"))
+            # Queue the webhook notification, returns right away
+            self.send_webhook(aura_name, rarity_value, os.path.basename(filename), image_data, aura_info["color"], aura_info.get("image"))
             self.previous_aura_name = aura_name
             self.last_detection_time = current_time
             print(f"Detected Aura: {aura_name}")
         else:
             print("No auras detected.")
 
-    def save_image(self, image, aura_name, star_type):
+    def encode_image(self, image):
+        return encode_image(image)
+
+    def save_image(self, image_data, aura_name, star_type):
+        # Rolls are rare, the Auras folder stays the user's gallery unlike the per-poll screenshots
         filename = os.path.expandvars(f"%appdata%/DSIM/images/Auras/{aura_name}_{star_type}.png")
-        cv2.imwrite(filename, image)
-        print(f"Saved aura image: {filename}")
+        if archive_image(image_data, filename):
+            print(f"Saved aura image: {filename}")
         return filename
 
     def run(self, interval=1):
         while True:
             self.getRobloxWindowSize()
-            screenshot = pyautogui.screenshot()
-            image = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-            self.detect_aura(image)
+            image = self.frame_source.get_frame(max_age=interval)
+            if image is not None:
+                self.detect_aura(image)
             time.sleep(interval)
 
 
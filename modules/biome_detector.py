@@ -1,17 +1,45 @@
-import time, pyautogui, pytesseract, json, os, re, requests, threading
+import time, pytesseract, json, os, re, requests, threading
 from difflib import SequenceMatcher
-from PIL import ImageEnhance
+from modules.frame_gate import FrameChangeGate
+from modules.biome_scheduler import BiomePollScheduler
+from modules.roblox_log import RobloxLogBiomeSource
+from modules.frame_source import FrameSource
+from modules.ocr_engine import get_ocr_engine
+from modules.ocr_preprocess import OcrPreprocessor
+from modules.glyph_recognizer import GlyphRecognizer
+from modules.biome_matcher import BiomeMatcher
+from modules.config_store import get_config_store
+from modules.image_pipeline import encode_image, image_file, archive_enabled, archive_image
 
 class BiomeDetector:
-    def __init__(self, biome_detector_running, config_path=os.path.expandvars("%appdata%/DSIM/config.json")):
+    def __init__(self, biome_detector_running, config_path=os.path.expandvars("%appdata%/DSIM/config.json"), frame_source=None, capture_backend=None):
         self.set_tesseract_path()
         self.biome_detector_running = biome_detector_running
+        self.frame_source = frame_source if frame_source is not None else FrameSource(capture_backend)
+        # Tesseract stays loaded between reads, shared with the merchant OCR
+        self.ocr_engine = get_ocr_engine()
         self.config = self.load_config(config_path)
+        self.ocr_preprocessor = OcrPreprocessor.from_config(self.config, "Biome_Region")
         self.detection_area = tuple(self.config.get("Biome_Region", (8,865,190,27)))
         self.current_biome = None
         self.last_detection_time = {}
         self.glitch_compare_ratio = 0.75  # 75% glitch similarity
         self.last_detected_text = None
+        # Skip OCR while the biome banner is unchanged since the last OCR
+        self.frame_gate = FrameChangeGate(threshold=self.config.get("FrameChangeThreshold", 2.0))
+        self.frame_max_age = 1
+        # Slows OCR down to a watch while a confirmed biome can't be over yet
+        self.poll_scheduler = BiomePollScheduler(
+            watch_interval=self.config.get("BiomeWatchInterval", 5),
+            ramp_lead=self.config.get("BiomeRampLead", 15),
+            change_threshold=self.config.get("BiomeBannerChangeThreshold", 8.0),
+        )
+        self.last_region = None
+        # Only written when ImageArchive is on, the webhook uploads the last banner from memory
+        self.biome_image_path = os.path.expandvars("%appdata%/DSIM/images/biomefound.png")
+        self.last_screenshot = None
+        # Seconds spent in each stage of the last capture_biome_text / match_biome calls
+        self.stage_times = {}
         self.biome_keywords = {
             "Windy": r"Windy|winoy|WINDY",
             "Rainy": r"Rainy|ramy|rain|rany|RAINY",
@@ -26,6 +54,10 @@ class BiomeDetector:
             "Pumpkin Moon": r"Pumpkin Moon|pumpkin|moon|PUMPKIN MOON|PUMPKIN|MOON|Pumpkinmoon|pumpkinmoon",
         }
         
+        # One compiled pass over the OCR text for every keyword, best scoring biome wins
+        self.biome_matcher = BiomeMatcher(self.biome_keywords, self.config.get("BiomeMatchConfidence", 0.0))
+        self.match_confidence = 0.0
+
         self.biome_data = {
             "Windy": {"color": 0x9ae5ff, "duration": 120},
             "Rainy": {"color": 0x027cbd, "duration": 120},
@@ -40,8 +72,29 @@ class BiomeDetector:
             "Pumpkin Moon": {"color": 0x762c00, "duration": 90},
         }
         
+        # Reads the banner from learned glyphs in about a millisecond, tesseract only runs when it isn't sure
+        self.glyph_recognizer = None
+        if self.config.get("BiomeGlyphRecognizer", True):
+            glyph_words = [biome for biome in self.biome_data if biome != "Glitched"] + ["Normal"]
+            self.glyph_recognizer = GlyphRecognizer(glyph_words, self.biome_keywords["Glitched"], self.config.get("BiomeGlyphPath"))
+
+        # "auto" follows the Roblox log and only falls back to OCR while the log says nothing, "ocr" never reads it
+        self.log_source = None
+        if self.config.get("BiomeSource", "auto") != "ocr":
+            self.log_source = RobloxLogBiomeSource(self.biome_data.keys(), self.config.get("RobloxLogDir"))
+
+        # A newly snipped banner region or OCR tuning applies without a restart
+        self.config.subscribe(self.apply_config)
+
         os.makedirs("images", exist_ok=True)
 
+    def apply_config(self, config, changed):
+        if "Biome_Region" in changed or "OcrPreprocess" in changed:
+            self.ocr_preprocessor = OcrPreprocessor.from_config(config, "Biome_Region")
+            self.detection_area = tuple(config.get("Biome_Region", (8,865,190,27)))
+            self.frame_gate.reset()
+            self.poll_scheduler.reset()
+
     def set_tesseract_path(self):
         common_paths = [
             r"C:\\Program Files\\Tesseract-OCR\\tesseract.exe",
@@ -55,21 +108,63 @@ class BiomeDetector:
         print("Tesseract executable not found. Please reinstall Tesseract again or specify the path manually :D")
 
     def load_config(self, path):
-        with open(path, "r") as file:
-            return json.load(file)
-
-    def capture_biome_text(self):
-        screenshot = pyautogui.screenshot(region=self.detection_area)
-        enhancer = ImageEnhance.Contrast(screenshot)
-        screenshot = enhancer.enhance(1.65)
-        enhancer = ImageEnhance.Brightness(screenshot)
-        screenshot = enhancer.enhance(1.05)
+        # The shared store, reads always see the current config.json
+        store = get_config_store(path)
+        store.snapshot()
+        return store
+
+    def capture_biome_text(self, force=False):
+        self.stage_times = {}
+        stage_start = time.perf_counter()
+        region = self.frame_source.get_region(self.detection_area, max_age=self.frame_max_age)
+        thumbnail = self.frame_gate.check(region, force=force) if region is not None and region.size > 0 else None
+        if thumbnail is not None and not force and not self.poll_scheduler.should_ocr(region):
+            # Changed, but not enough for the scheduler yet. The gate keeps comparing against the last banner
+            # that was read, so a change between the two thresholds isn't lost
+            self.frame_gate.skipped += 1
+            thumbnail = None
+        if thumbnail is None:
+            self.stage_times["capture"] = time.perf_counter() - stage_start
+            return None
+
+        self.frame_gate.mark_run(thumbnail)
+
+        self.last_region = region
+        screenshot = self.enhance_banner(region)
         
-        # Save the screenshot
-        screenshot.save(os.path.expandvars("%appdata%/DSIM/images/biomefound.png"))
-        text = pytesseract.image_to_string(screenshot)
-        return text.strip()
+        # Kept in memory for the webhook, nothing is written per poll
+        self.last_screenshot = screenshot
+        self.stage_times["capture"] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        ocr_input = self.ocr_preprocessor.finish(screenshot)
+        self.stage_times["preprocess"] = time.perf_counter() - stage_start
 
+        if self.glyph_recognizer is not None:
+            stage_start = time.perf_counter()
+            text = self.glyph_recognizer.recognize(ocr_input)
+            self.stage_times["glyphs"] = time.perf_counter() - stage_start
+            if text is not None:
+                return text
+
+        stage_start = time.perf_counter()
+        text = self.ocr_engine.image_to_string(ocr_input).strip()
+        self.stage_times["ocr"] = time.perf_counter() - stage_start
+        if self.glyph_recognizer is not None:
+            # Banners tesseract reads as a known word teach the recognizer their glyphs
+            self.glyph_recognizer.learn(ocr_input, text)
+        return text
+
+    def enhance_banner(self, region):
+        # Contrast/brightness only, this is also the picture the webhook shows
+        return self.ocr_preprocessor.enhance(region)
+
+    def grab_banner(self):
+        # Banner picture for a webhook when the biome came from the log and nothing was OCR'd
+        region = self.frame_source.get_region(self.detection_area, max_age=self.frame_max_age)
+        if region is None or region.size == 0:
+            return None
+        return self.enhance_banner(region)
 
     def send_webhook(self, biome, message_type):
         webhook_url = self.config.get("WebhookLink", "")
@@ -101,31 +196,39 @@ class BiomeDetector:
             ]
         }
 
-        with open(os.path.expandvars("%appdata%/DSIM/images/biomefound.png"), "rb") as image_file:
-            payload_json = json.dumps(payload)
+        files = None
+        if self.last_screenshot is not None:
+            image_data = encode_image(self.last_screenshot)
+            archive_image(image_data, self.biome_image_path, archive_enabled(self.config))
             files = {
-                "file": ("biomefound.png", image_file, "image/png")
-            }
-            new_payload = {
-                "payload_json": payload_json
+                "file": image_file("biomefound.png", image_data)
             }
+        else:
+            del payload["embeds"][0]["image"]
 
-            try:
-                response = requests.post(webhook_url, data=new_payload, files=files)
-                response.raise_for_status()
-                print(f"Sent {message_type} for {biome}")
-            except requests.exceptions.RequestException as e:
-                print(f"Failed to send webhook: {e}")
+        payload_json = json.dumps(payload)
+        new_payload = {
+            "payload_json": payload_json
+        }
 
-    def detect_biome(self):
-        text = self.capture_biome_text()
-        print(f"Detected OCR Text: {text}")
+        try:
+            response = requests.post(webhook_url, data=new_payload, files=files)
+            response.raise_for_status()
+            print(f"Sent {message_type} for {biome}")
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to send webhook: {e}")
+
+    def match_biome(self, text):
+        # Biome name from OCR text, also keeps the text for the next Glitched comparison
+        stage_start = time.perf_counter()
 
-        # Extract numerical patterns in x.xxxxxxxx format for Glitched Biome detection
-        numbers = re.findall(self.biome_keywords["Glitched"], text)
-        #print(f"Extracted Numbers: {numbers}")
+        scores = self.biome_matcher.scores(text)
+
+        # Numerical patterns in x.xxxxxxxx format are the Glitched Biome
+        numbers = "Glitched" in scores
 
         biome = None
+        self.match_confidence = 0.0
 
 
         if numbers and self.last_detected_text:
@@ -135,15 +238,65 @@ class BiomeDetector:
             if similarity >= self.glitch_compare_ratio:
                 print("Glitched omg omg!!11!")
                 biome = "Glitched"
+                self.match_confidence = scores["Glitched"]
         
         
         self.last_detected_text = text
         
         if not biome:
-            for biome_key, keyword in self.biome_keywords.items():
-                if re.search(keyword, text, re.IGNORECASE):
-                    biome = biome_key
-                    break
+            biome, self.match_confidence = self.biome_matcher.best(scores)
+
+        self.stage_times["match"] = time.perf_counter() - stage_start
+        return biome
+
+    def glitch_pending(self):
+        # Glitched needs two similar reads in a row, so never skip the read after a number was seen
+        return bool(self.last_detected_text and re.search(self.biome_keywords["Glitched"], self.last_detected_text))
+
+    def detect_biome_from_log(self):
+        # True while the Roblox log is the biome source, the OCR path is skipped then
+        if self.log_source is None:
+            return False
+        changed, biome = self.log_source.poll()
+        if not self.log_source.active():
+            return False
+
+        if changed:
+            if biome is None:
+                print("Biome ended (Roblox log)")
+                self.current_biome = None
+            else:
+                # The log reports each biome once, no OCR cooldown needed
+                self.last_detection_time[biome] = time.time()
+                self.last_screenshot = self.grab_banner()
+                self.notify_biome(biome)
+        return True
+
+    def notify_biome(self, biome):
+        if biome != self.current_biome:
+            self.current_biome = biome
+            print(f"Detected Biome: {self.current_biome}")
+
+            notifier_key = f"Biome_Notifer_{biome}"
+            message_type = self.config.get(notifier_key, "None")
+            if message_type in ["Message", "Ping"]:
+                self.send_webhook(biome, message_type)
+
+    def detect_biome(self):
+        if self.detect_biome_from_log():
+            return
+
+        # Once Glitched is confirmed its numbers are only watched like any other biome
+        force = self.glitch_pending() and self.poll_scheduler.biome != "Glitched"
+        text = self.capture_biome_text(force=force)
+        if text is None:
+            return
+
+        print(f"Detected OCR Text: {text}")
+        biome = self.match_biome(text)
+
+        if not biome:
+            self.poll_scheduler.observe(None, self.last_region)
 
         # Proceed with biome detection and notifications
         if biome:
@@ -152,17 +305,12 @@ class BiomeDetector:
             last_detection = self.last_detection_time.get(biome, 0)
 
             if current_time - last_detection < duration:
+                self.poll_scheduler.observe(biome, self.last_region, last_detection, duration)
                 return
 
             self.last_detection_time[biome] = current_time
-            if biome != self.current_biome:
-                self.current_biome = biome
-                print(f"Detected Biome: {self.current_biome}")
-
-                notifier_key = f"Biome_Notifer_{biome}"
-                message_type = self.config.get(notifier_key, "None")
-                if message_type in ["Message", "Ping"]:
-                    self.send_webhook(biome, message_type)
+            self.poll_scheduler.observe(biome, self.last_region, current_time, duration)
+            self.notify_biome(biome)
 
     def run(self):
         while self.biome_detector_running.is_set():
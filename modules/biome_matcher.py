@@ -0,0 +1,54 @@
+import re
+
+# Patterns without any regex syntax besides "|" are plain word lists
+PLAIN_ALTERNATION = re.compile(r"[^\\()\[\]{}.*+?^$]*")
+
+
+class BiomeMatcher:
+    # All biome keyword patterns compiled into one alternation, the OCR text is scanned once.
+    # Every biome found gets a confidence: the share of the text's letters/digits its longest match covers
+    def __init__(self, keywords, min_confidence=0.0):
+        self.names = list(keywords)
+        # Group names have to be identifiers, biome names aren't ("Pumpkin Moon")
+        self.groups = {f"biome{index}": name for index, name in enumerate(self.names)}
+        patterns = [self.without_duplicates(pattern) for pattern in keywords.values()]
+        self.pattern = re.compile("|".join(f"(?P<biome{index}>{pattern})" for index, pattern in enumerate(patterns)), re.IGNORECASE)
+        self.min_confidence = min_confidence
+
+    def without_duplicates(self, pattern):
+        # "Windy|winoy|WINDY" is "Windy|winoy" once case is ignored, fewer alternatives to try at every position
+        if not PLAIN_ALTERNATION.fullmatch(pattern):
+            return pattern
+        words = {}
+        for word in pattern.split("|"):
+            words.setdefault(word.lower(), word)
+        return "|".join(words.values())
+
+    def significant(self, text):
+        return sum(char.isalnum() or char == "." for char in text)
+
+    def scores(self, text):
+        # Biome -> confidence (0-1] for every biome with a match in text
+        total = None
+        scores = {}
+        for match in self.pattern.finditer(text):
+            if total is None:
+                total = self.significant(text)
+            biome = self.groups[match.lastgroup]
+            score = min(self.significant(match.group()) / total, 1.0) if total else 0.0
+            if score > scores.get(biome, -1):
+                scores[biome] = score
+        return scores
+
+    def best(self, scores):
+        # Highest confidence, ties go to the biome listed first
+        biome, confidence = None, 0.0
+        for name in self.names:
+            if name in scores and scores[name] > confidence:
+                biome, confidence = name, scores[name]
+        if biome is None or confidence < self.min_confidence:
+            return None, confidence
+        return biome, confidence
+
+    def match(self, text):
+        return self.best(self.scores(text))
@@ -0,0 +1,60 @@
+import time
+from modules.frame_gate import FrameChangeGate
+
+
+class BiomePollScheduler:
+    # Decides when the biome banner is worth an OCR. A confirmed biome can't change for most of its
+    # duration, so it's only watched at a low rate, back to every tick near its expected end or as soon
+    # as the banner pixels move
+    def __init__(self, watch_interval=5, ramp_lead=15, change_threshold=8.0):
+        self.watch_interval = watch_interval
+        self.ramp_lead = ramp_lead
+        # Cheap pixel check against the banner of the last OCR, like the frame gate with a higher threshold
+        self.banner_gate = FrameChangeGate(threshold=change_threshold)
+
+        self.biome = None
+        self.started = 0
+        self.duration = 0
+        self.last_ocr = 0
+        self.skipped = 0
+        self.created = time.time()
+
+    def should_ocr(self, region, now=None):
+        now = time.time() if now is None else now
+        if self.biome is None:
+            return True
+        # Near (or past) the expected end, poll at full rate for the next biome
+        if now - self.started >= self.duration - self.ramp_lead:
+            return True
+        if now - self.last_ocr >= self.watch_interval:
+            return True
+        if self.banner_gate.difference(self.banner_gate.thumbnail(region)) >= self.banner_gate.threshold:
+            return True
+
+        self.skipped += 1
+        return False
+
+    def observe(self, biome, region, started=None, duration=0, now=None):
+        # Result of an OCR read, started is when the biome was first detected
+        now = time.time() if now is None else now
+        self.last_ocr = now
+        self.biome = biome
+        if biome is None:
+            self.banner_gate.reset()
+            return
+
+        self.started = now if started is None else started
+        self.duration = duration
+        self.banner_gate.last_thumbnail = self.banner_gate.thumbnail(region)
+
+    def reset(self):
+        self.biome = None
+        self.banner_gate.reset()
+
+    def stats(self):
+        hours = (time.time() - self.created) / 3600
+        return {
+            "biome": self.biome,
+            "ocr_skipped": self.skipped,
+            "ocr_saved_per_hour": self.skipped / hours if hours else 0.0,
+        }
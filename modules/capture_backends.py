@@ -0,0 +1,158 @@
+import os
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class CaptureBackend(ABC):
+    # Every backend returns RGB uint8 arrays, region is (x, y, w, h) in screen coordinates
+    name = "base"
+
+    @abstractmethod
+    def grab(self, region=None):
+        pass
+
+    def window_rect(self):
+        # Rect of the Roblox client if the backend knows it, None means look up the live window
+        return None
+
+    def close(self):
+        pass
+
+
+def crop(frame, region):
+    if frame is None or region is None:
+        return frame
+    x, y, w, h = (int(v) for v in region)
+    return frame[max(y, 0):max(y + h, 0), max(x, 0):max(x + w, 0)]
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    # The original capture path, works everywhere pyautogui does
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+        self.pyautogui = pyautogui
+
+    def grab(self, region=None):
+        screenshot = self.pyautogui.screenshot(region=tuple(region) if region else None)
+        return np.asarray(screenshot)
+
+
+class MSSBackend(CaptureBackend):
+    # Faster capture through mss, only copies the requested region. Monitor 1 is the primary, like pyautogui
+    name = "mss"
+
+    def __init__(self, monitor=1):
+        import mss
+        self.mss = mss
+        self.monitor = monitor
+        self.sct = None
+
+    def grab(self, region=None):
+        # mss handles are per thread, the frame source serializes grabs with its lock
+        if self.sct is None:
+            self.sct = self.mss.mss()
+        if region:
+            x, y, w, h = (int(v) for v in region)
+            area = {"left": x, "top": y, "width": w, "height": h}
+        else:
+            area = self.sct.monitors[self.monitor]
+        shot = np.asarray(self.sct.grab(area))
+        return cv2.cvtColor(shot, cv2.COLOR_BGRA2RGB)
+
+    def close(self):
+        if self.sct is not None:
+            self.sct.close()
+            self.sct = None
+
+
+class ReplayBackend(CaptureBackend):
+    # Plays back a folder of screenshots (sorted by name) or a video file, one frame per grab
+    name = "replay"
+
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self.frame_index = -1
+        self.frame_name = None
+        self.last_frame = None
+        self.video = None
+        self.files = []
+
+        if os.path.isdir(path):
+            self.files = sorted(
+                os.path.join(path, filename) for filename in os.listdir(path)
+                if filename.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            if not self.files:
+                raise FileNotFoundError(f"No images found in replay folder: {path}")
+        elif os.path.isfile(path):
+            self.video = cv2.VideoCapture(path)
+            if not self.video.isOpened():
+                raise FileNotFoundError(f"Could not open replay video: {path}")
+        else:
+            raise FileNotFoundError(f"Replay source not found: {path}")
+
+    def __len__(self):
+        if self.video is not None:
+            return int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
+        return len(self.files)
+
+    def next_frame(self):
+        if self.video is not None:
+            ok, frame = self.video.read()
+            if not ok and self.loop:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self.video.read()
+            if not ok:
+                return None
+            self.frame_index = int(self.video.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+            self.frame_name = f"{os.path.basename(self.path)}#{self.frame_index}"
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        index = self.frame_index + 1
+        if index >= len(self.files):
+            if not self.loop:
+                return None
+            index = 0
+        self.frame_index = index
+        self.frame_name = os.path.basename(self.files[index])
+        frame = cv2.imread(self.files[index], cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError(f"Could not read replay frame: {self.files[index]}")
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def grab(self, region=None):
+        # None once a non-looping replay is exhausted
+        frame = self.next_frame()
+        if frame is not None:
+            self.last_frame = frame
+        return crop(frame, region)
+
+    def window_rect(self):
+        # Recorded frames are treated as the Roblox client itself
+        if self.last_frame is None:
+            return None
+        return 0, 0, self.last_frame.shape[1], self.last_frame.shape[0]
+
+    def close(self):
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+
+
+def create_capture_backend(name="pyautogui", replay_path=None, replay_loop=False):
+    name = (name or "pyautogui").lower()
+    if name == "mss":
+        try:
+            return MSSBackend()
+        except ImportError:
+            print("mss is not installed, falling back to pyautogui capture.")
+            return PyAutoGUIBackend()
+    if name == "replay":
+        return ReplayBackend(replay_path, loop=replay_loop)
+    return PyAutoGUIBackend()
@@ -0,0 +1,195 @@
+import hashlib, json, os, struct, threading
+from array import array
+from pynput import mouse, keyboard
+
+# Event kinds of a compiled recording
+MOUSE_PRESS, MOUSE_RELEASE, MOUSE_MOVE, KEY_PRESS, KEY_RELEASE = range(5)
+MOUSE_BUTTONS = {"Button.left": mouse.Button.left, "Button.right": mouse.Button.right}
+AZERTY_MAP = {'a': 'q', 'q': 'a', 'w': 'z', 'z': 'w', 's': 's', 'd': 'd'}
+
+# Binary cache file: magic, action count, length of the target name table (JSON), then the arrays
+MAGIC = b"DSIMREC1"
+HEADER = struct.Struct("<8sII")
+
+
+def resolve_target(name):
+    # "Key.space" -> keyboard.Key.space, "Button.left" -> mouse.Button.left, anything else is a character
+    if name in MOUSE_BUTTONS:
+        return MOUSE_BUTTONS[name]
+    if name.startswith("Key."):
+        key = getattr(keyboard.Key, name[4:], None)
+        if key is not None:
+            return key
+    return name.replace("'", "")
+
+
+class CompiledRecording:
+    # A recording resolved once for replay, parallel arrays indexed by action:
+    # seconds from the start, event kind, index into targets (pynput Key/Button or a character) and position
+    def __init__(self, timestamps, events, target_ids, xs, ys, target_names):
+        self.timestamps = timestamps
+        self.events = events
+        self.target_ids = target_ids
+        self.xs = xs
+        self.ys = ys
+        self.target_names = target_names
+        self.targets = [resolve_target(name) for name in target_names]
+        # Resolved per action so the replay loop doesn't even index the table
+        self.action_targets = [self.targets[index] for index in target_ids]
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def from_actions(cls, actions, azerty=False):
+        timestamps, events, target_ids = array("d"), array("B"), array("H")
+        xs, ys = array("i"), array("i")
+        target_names, name_ids = [], {}
+
+        for action in actions:
+            if action["type"] == "mouse":
+                name = action["button"]
+                if name in MOUSE_BUTTONS:
+                    event = MOUSE_PRESS if action["pressed"] else MOUSE_RELEASE
+                elif action["pressed"]:
+                    # Unknown buttons were never pressed, but the cursor still went there
+                    event = MOUSE_MOVE
+                else:
+                    continue
+                x, y = int(action["x"]), int(action["y"])
+            elif action["type"] == "keyboard":
+                name = action["key"]
+                if azerty:
+                    name = AZERTY_MAP.get(name, name)
+                event = KEY_PRESS if action["pressed"] else KEY_RELEASE
+                x = y = 0
+            else:
+                continue
+
+            if name not in name_ids:
+                name_ids[name] = len(target_names)
+                target_names.append(name)
+            timestamps.append(float(action["timestamp"]))
+            events.append(event)
+            target_ids.append(name_ids[name])
+            xs.append(x)
+            ys.append(y)
+
+        return cls(timestamps, events, target_ids, xs, ys, target_names)
+
+    def to_bytes(self):
+        table = json.dumps(self.target_names).encode("utf-8")
+        parts = [HEADER.pack(MAGIC, len(self), len(table)), table]
+        parts += [values.tobytes() for values in (self.timestamps, self.events, self.target_ids, self.xs, self.ys)]
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, count, table_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a compiled recording")
+        offset = HEADER.size
+        target_names = json.loads(data[offset:offset + table_length].decode("utf-8"))
+        offset += table_length
+
+        arrays = []
+        for typecode in ("d", "B", "H", "i", "i"):
+            values = array(typecode)
+            size = values.itemsize * count
+            values.frombytes(data[offset:offset + size])
+            if len(values) != count:
+                raise ValueError("Truncated compiled recording")
+            arrays.append(values)
+            offset += size
+        return cls(*arrays, target_names)
+
+
+class RecordingCache:
+    # Compiled recordings by content hash (and keyboard layout), in memory and as small binary files so a
+    # restart doesn't parse the JSON again. A recording is only re-read when its mtime or size changed
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = os.path.expandvars("%appdata%/DSIM/compiled_paths")
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self.compiled = {}
+        # path -> (mtime, size, hash) of the last time it was read
+        self.file_hashes = {}
+        self.compiles = 0
+        self.hits = 0
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        known = self.file_hashes.get(path)
+        if known and known[0] == stamp:
+            return known[1], None
+        with open(path, "rb") as file:
+            data = file.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        self.file_hashes[path] = (stamp, digest)
+        return digest, data
+
+    def load(self, path, azerty=False):
+        with self.lock:
+            digest, data = self.file_hash(path)
+            key = f"{digest}_{'azerty' if azerty else 'qwerty'}"
+            recording = self.compiled.get(key)
+            if recording is not None:
+                self.hits += 1
+                return recording
+
+            cache_path = os.path.join(self.cache_dir, f"{key}.bin")
+            recording = self.read_cache(cache_path)
+            if recording is None:
+                if data is None:
+                    with open(path, "rb") as file:
+                        data = file.read()
+                recording = CompiledRecording.from_actions(json.loads(data), azerty)
+                self.write_cache(cache_path, recording)
+                self.compiles += 1
+            self.compiled[key] = recording
+            return recording
+
+    def read_cache(self, cache_path):
+        try:
+            with open(cache_path, "rb") as file:
+                return CompiledRecording.from_bytes(file.read())
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def write_cache(self, cache_path, recording):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(recording.to_bytes())
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not cache compiled recording: {e}")
+
+    def preload(self, paths, azerty=False):
+        # Compiles every recording up front, returns how many loaded
+        loaded = 0
+        for path in paths:
+            try:
+                self.load(path, azerty)
+                loaded += 1
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not preload recording {path}: {e}")
+        return loaded
+
+    def stats(self):
+        return {"recordings": len(self.compiled), "compiles": self.compiles, "hits": self.hits}
+
+
+shared_cache = None
+shared_cache_lock = threading.Lock()
+
+
+def get_recording_cache():
+    global shared_cache
+    with shared_cache_lock:
+        if shared_cache is None:
+            shared_cache = RecordingCache()
+        return shared_cache
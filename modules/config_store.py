@@ -0,0 +1,284 @@
+import atexit, copy, json, os, threading, time
+
+CONFIG_PATH = os.path.expandvars("%appdata%/DSIM/config.json")
+MISSING = object()
+
+
+class ConfigStore:
+    # config.json parsed once and shared by the UI, macro loop, detectors and Discord bot.
+    # The dict behind it is replaced on every change and never mutated, so a snapshot stays consistent
+    # on any thread. The file is stat'ed at most every check_interval seconds and only re-parsed when
+    # its mtime or size moved. Writes land in memory right away and reach the disk in one atomic write
+    # once they stop coming for flush_delay seconds (max_flush_delay at the latest)
+    def __init__(self, path=CONFIG_PATH, check_interval=1.0, flush_delay=0.5, max_flush_delay=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.flush_delay = flush_delay
+        self.max_flush_delay = max_flush_delay
+        self.lock = threading.RLock()
+        self.data = {}
+        self.exists = False
+        self.stamp = None
+        self.last_check = 0
+        self.subscribers = []
+        self.watch_thread = None
+        # Keys changed in memory but not written yet, with when the first and last of them came in
+        self.pending = {}
+        self.first_pending = 0
+        self.last_pending = 0
+        self.flush_timer = None
+        self.reloads = 0
+        self.updates = 0
+        self.writes = 0
+        self.refresh(force=True)
+
+    def file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def changed_keys(self, old, new):
+        return {key for key in old.keys() | new.keys() if old.get(key, MISSING) != new.get(key, MISSING)}
+
+    def refresh(self, force=False):
+        # Picks up edits made to the file by anything else, returns the keys that changed
+        now = time.monotonic()
+        # Checked once without the lock so plain reads never wait behind a write
+        if not force and now - self.last_check < self.check_interval:
+            return set()
+        with self.lock:
+            if not force and now - self.last_check < self.check_interval:
+                return set()
+            self.last_check = now
+            stamp = self.file_stamp()
+            if not force and stamp == self.stamp:
+                return set()
+            self.stamp = stamp
+
+            data, exists = self.read_file()
+            if data is None:
+                return set()
+            # Changes that aren't on disk yet win over what the file says
+            data.update(copy.deepcopy(self.pending))
+            exists = exists or bool(self.pending)
+
+            changed = self.changed_keys(self.data, data)
+            self.data = data
+            self.exists = exists
+            self.reloads += 1
+
+        self.notify(data, changed)
+        return changed
+
+    def read_file(self):
+        # (config, exists), config is None if the file couldn't be parsed
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file), True
+        except FileNotFoundError:
+            return {}, False
+        except (OSError, ValueError) as e:
+            # Most likely read halfway through someone else's write, the next write moves the mtime again
+            print(f"Could not read {self.path}: {e}")
+            return None, True
+
+    def snapshot(self):
+        # The whole config as a dict, read only. Raises FileNotFoundError like opening the file did
+        self.refresh()
+        if not self.exists:
+            raise FileNotFoundError(self.path)
+        return self.data
+
+    def get(self, key, default=None):
+        self.refresh()
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        self.refresh()
+        return self.data[key]
+
+    def __contains__(self, key):
+        self.refresh()
+        return key in self.data
+
+    def get_bool(self, key, default=False):
+        value = self.get(key, default)
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+
+    def get_int(self, key, default=0):
+        try:
+            return int(self.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_float(self, key, default=0.0):
+        try:
+            return float(self.get(key, default))
+        except (TypeError, ValueError):
+            return default
+
+    def get_str(self, key, default=""):
+        value = self.get(key, default)
+        return default if value is None else str(value)
+
+    def get_list(self, key, default=None):
+        # A copy, callers may change it
+        value = self.get(key, MISSING)
+        if not isinstance(value, list):
+            return list(default or [])
+        return copy.deepcopy(value)
+
+    def update(self, changes):
+        # Merges changes into the config, readers see them at once and the file is written a bit later
+        changes = copy.deepcopy(changes)
+        with self.lock:
+            data = dict(self.data)
+            data.update(changes)
+            changed = self.changed_keys(self.data, data)
+            if not changed:
+                return changed
+
+            now = time.monotonic()
+            if not self.pending:
+                self.first_pending = now
+            self.last_pending = now
+            self.pending.update({key: copy.deepcopy(data[key]) for key in changed})
+            self.data = data
+            self.exists = True
+            self.updates += 1
+            self.schedule_flush(self.flush_delay)
+
+        self.notify(data, changed)
+        return changed
+
+    def schedule_flush(self, delay):
+        if self.flush_timer is None:
+            self.flush_timer = threading.Timer(delay, self.flush_when_idle)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+
+    def flush_when_idle(self):
+        with self.lock:
+            self.flush_timer = None
+            now = time.monotonic()
+            # Still changing (a spinbox held down, someone typing), wait for a pause unless it's been too long
+            quiet_for = now - self.last_pending
+            if quiet_for < self.flush_delay and now - self.first_pending < self.max_flush_delay:
+                self.schedule_flush(self.flush_delay - quiet_for)
+                return
+        self.flush()
+
+    def flush(self):
+        # Writes the pending changes now, returns False if the write failed (it's retried later)
+        with self.lock:
+            if not self.pending:
+                return True
+
+            data = self.data
+            if self.file_stamp() != self.stamp:
+                # Edited on disk since our last read or write, keep those edits and lay ours on top
+                on_disk, _ = self.read_file()
+                if on_disk is not None:
+                    data = on_disk
+                    data.update(copy.deepcopy(self.pending))
+
+            try:
+                self.write_file(data)
+            except OSError as e:
+                print(f"Could not save {self.path}: {e}")
+                self.schedule_flush(self.max_flush_delay)
+                return False
+
+            changed = self.changed_keys(self.data, data)
+            self.data = data
+            self.stamp = self.file_stamp()
+            self.pending = {}
+            self.writes += 1
+
+        self.notify(data, changed)
+        return True
+
+    def write_file(self, data):
+        # Written next to config.json then renamed over it, a crash or a reader never sees half a file
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        for attempt in range(5):
+            try:
+                os.replace(tmp_path, self.path)
+                return
+            except PermissionError:
+                # Windows refuses while another program has config.json open, that doesn't last long
+                if attempt == 4:
+                    raise
+                time.sleep(0.05)
+
+    def set(self, key, value):
+        return self.update({key: value})
+
+    def subscribe(self, callback):
+        # callback(config, changed_keys) runs on whichever thread noticed the change, keep it short
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def notify(self, data, changed):
+        if not changed:
+            return
+        for callback in list(self.subscribers):
+            try:
+                callback(data, changed)
+            except Exception as e:
+                print(f"Config subscriber failed: {e}")
+
+    def watch(self):
+        # Polls the file in the background so subscribers hear about edits even when nobody reads
+        if self.watch_thread is None or not self.watch_thread.is_alive():
+            self.watch_thread = threading.Thread(target=self.watch_loop, name="ConfigWatch", daemon=True)
+            self.watch_thread.start()
+        return self.watch_thread
+
+    def watch_loop(self):
+        while True:
+            time.sleep(self.check_interval)
+            self.refresh()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "keys": len(self.data),
+            "reloads": self.reloads,
+            "subscribers": len(self.subscribers),
+            "updates": self.updates,
+            "writes": self.writes,
+            "pending": len(self.pending),
+        }
+
+
+config_stores = {}
+config_stores_lock = threading.Lock()
+
+
+def get_config_store(path=None):
+    # One store per config file for the whole process
+    path = os.path.abspath(path or CONFIG_PATH)
+    with config_stores_lock:
+        store = config_stores.get(path)
+        if store is None:
+            store = ConfigStore(path)
+            store.watch()
+            # Whatever is still pending when the app closes
+            atexit.register(store.flush)
+            config_stores[path] = store
+        return store
@@ -3,10 +3,11 @@ import discord, json, threading, pyautogui, requests, os
 from discord.ext import commands # type: ignore
 from discord import app_commands # type: ignore
 from datetime import datetime
+from modules.image_pipeline import encode_image, image_file, archive_enabled, archive_image
+from modules.config_store import get_config_store
 
-CONFIG_PATH = os.path.expandvars("%appdata%/DSIM/config.json")
-with open(CONFIG_PATH, "r") as file:
-    config = json.load(file)
+# Shared with the UI and the macro loop, always the current config.json
+config = get_config_store()
 user = None
 
 intents = discord.Intents.default()
@@ -14,9 +15,7 @@ intents.message_content = True  # Enable message content intent
 bot = commands.Bot(command_prefix="/", intents=intents)
 
 def update_config(key, value):
-    config[key] = value
-    with open(CONFIG_PATH, "w") as file:
-        json.dump(config, file, indent=4)
+    config.set(key, value)
 
 # setup bot and register commands
 def setup_bot(macro, running_event):
@@ -114,11 +113,9 @@ def setup_bot(macro, running_event):
         await ctx.response.defer(ephemeral=True)
 
         try:
-            os.makedirs("images", exist_ok=True)
-
             screenshot_path = os.path.expandvars("%appdata%/DSIM/images/current_screen.png")
-            screenshot = pyautogui.screenshot()
-            screenshot.save(screenshot_path)
+            image_data = encode_image(pyautogui.screenshot())
+            archive_image(image_data, screenshot_path, archive_enabled(config))
 
             current_time = datetime.now().strftime("%H:%M:%S")
             webhook_url = config.get("WebhookLink")
@@ -131,18 +128,17 @@ def setup_bot(macro, running_event):
                     "image": {"url": f"attachment://{os.path.basename(screenshot_path)}"}
                 }]
 
-                with open(screenshot_path, "rb") as image_file:
-                    payload = {
-                        "payload_json": json.dumps({
-                            "embeds": embeds
-                        })
-                    }
-                    files = {"file": (os.path.basename(screenshot_path), image_file, "image/png")}
-                    webhook_response = requests.post(
-                        webhook_url,
-                        data=payload,
-                        files=files
-                    )
+                payload = {
+                    "payload_json": json.dumps({
+                        "embeds": embeds
+                    })
+                }
+                files = {"file": image_file(os.path.basename(screenshot_path), image_data)}
+                webhook_response = requests.post(
+                    webhook_url,
+                    data=payload,
+                    files=files
+                )
 
                 if webhook_response.status_code in [200, 204]:
                     local_embed = discord.Embed(
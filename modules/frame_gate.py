@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+
+
+class FrameChangeGate:
+    # Tells a detector whether the watched region changed since the last frame it actually processed
+    def __init__(self, threshold=2.0, thumbnail_size=64):
+        self.threshold = threshold
+        self.thumbnail_size = thumbnail_size
+        self.last_thumbnail = None
+        self.skipped = 0
+        self.executed = 0
+
+    def thumbnail(self, image):
+        image = np.asarray(image)
+        if image.ndim == 3:
+            image = cv2.cvtColor(image[:, :, :3], cv2.COLOR_BGR2GRAY)
+        height, width = image.shape
+        scale = min(1.0, self.thumbnail_size / max(height, width, 1))
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def difference(self, thumbnail):
+        # Mean absolute difference of the gray thumbnails, 0-255
+        if self.last_thumbnail is None or self.last_thumbnail.shape != thumbnail.shape:
+            return float("inf")
+        return float(np.mean(np.abs(thumbnail - self.last_thumbnail)))
+
+    def check(self, image, force=False):
+        # The region's thumbnail if it changed enough to process, None (counted as skipped) otherwise.
+        # Nothing is remembered until mark_run, so a caller can still decide not to run
+        thumbnail = self.thumbnail(image)
+        if not force and self.difference(thumbnail) < self.threshold:
+            self.skipped += 1
+            return None
+        return thumbnail
+
+    def mark_run(self, thumbnail):
+        self.last_thumbnail = thumbnail
+        self.executed += 1
+
+    def should_run(self, image, force=False):
+        thumbnail = self.check(image, force=force)
+        if thumbnail is None:
+            return False
+        self.mark_run(thumbnail)
+        return True
+
+    def reset(self):
+        self.last_thumbnail = None
+
+    def stats(self):
+        total = self.skipped + self.executed
+        return {
+            "skipped": self.skipped,
+            "executed": self.executed,
+            "skip_ratio": self.skipped / total if total else 0.0,
+        }
@@ -0,0 +1,59 @@
+import threading, time
+from modules.capture_backends import PyAutoGUIBackend
+
+
+class FrameSource:
+    # One desktop capture shared by every consumer, handed out as a read-only RGB array
+    def __init__(self, backend=None, max_age=1.0):
+        self.backend = backend if backend is not None else PyAutoGUIBackend()
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.frame = None
+        self.frame_time = 0
+        self.captures = 0
+        self.reuses = 0
+
+    def capture(self, region=None):
+        frame = self.backend.grab(region)
+        if frame is not None:
+            frame.flags.writeable = False
+        return frame
+
+    def get_frame(self, max_age=None):
+        # Reuse the last capture if it's younger than max_age seconds, max_age=0 forces a new one
+        if max_age is None:
+            max_age = self.max_age
+
+        with self.lock:
+            now = time.perf_counter()
+            if self.frame is not None and now - self.frame_time <= max_age:
+                self.reuses += 1
+                return self.frame
+
+            self.frame = self.capture()
+            self.frame_time = time.perf_counter()
+            self.captures += 1
+            return self.frame
+
+    def get_region(self, region, max_age=None):
+        # View of (x, y, w, h) in screen coordinates, no copy
+        if max_age == 0:
+            # A fresh grab is never shared, so only capture the region itself
+            with self.lock:
+                self.captures += 1
+                return self.capture(region)
+
+        frame = self.get_frame(max_age)
+        if frame is None:
+            return None
+        x, y, w, h = (int(v) for v in region)
+        return frame[max(y, 0):max(y + h, 0), max(x, 0):max(x + w, 0)]
+
+    def window_rect(self):
+        return self.backend.window_rect()
+
+    def stats(self):
+        return {"backend": self.backend.name, "captures": self.captures, "reuses": self.reuses}
+
+    def close(self):
+        self.backend.close()
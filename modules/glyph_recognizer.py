@@ -0,0 +1,241 @@
+import io, os, re, sys
+import cv2
+import numpy as np
+
+# Every glyph is resized to this (width, height) before comparing, plus its width/height ratio
+GLYPH_SIZE = (12, 16)
+# Banner characters besides the biome words and Glitched numbers
+FRAME_CHARS = "[]"
+
+
+class GlyphRecognizer:
+    # Reads the biome banner without tesseract: the banner is one fixed font and a handful of words, so every
+    # glyph is matched against glyphs cut from banners tesseract already read correctly (nearest neighbour).
+    # Returns the word (or number) only when exactly one fits every glyph, otherwise None and the caller OCRs
+    def __init__(self, words, number_pattern=None, path=None, max_distance=0.2, ambiguity_ratio=0.75, min_area=6, split_ratio=1.5, max_templates=6, frozen=False):
+        if path is None:
+            path = os.path.expandvars("%appdata%/DSIM/glyphs.npz")
+        self.path = path
+        # Banner text with spaces and frame characters removed -> what it is read as
+        self.words = {self.core(word): word for word in words}
+        self.number_pattern = re.compile(number_pattern) if number_pattern else None
+        # Mean pixel difference (0-1) above which a glyph is unknown
+        self.max_distance = max_distance
+        # Characters whose match is within best / ambiguity_ratio are all kept, the word list decides between them
+        self.ambiguity_ratio = ambiguity_ratio
+        self.min_area = min_area
+        # Letters of the outlined font can touch, a glyph this many times wider than the median may be two
+        self.split_ratio = split_ratio
+        # Per character, new samples are only kept while they look different from the ones already known
+        self.max_templates = max_templates
+        self.novelty = max_distance / 4
+        # Reads only, nothing is learned or written (evaluation runs)
+        self.frozen = frozen
+
+        self.labels = []
+        self.templates = np.zeros((0, GLYPH_SIZE[0] * GLYPH_SIZE[1] + 1), dtype=np.float32)
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+        self.load()
+
+    def core(self, text):
+        return "".join(char for char in text.upper() if char.isalnum() or char == ".")
+
+    def load(self):
+        try:
+            with np.load(self.path) as data:
+                self.labels = [str(label) for label in data["labels"]]
+                self.templates = data["templates"].astype(np.float32)
+        except (OSError, KeyError, ValueError):
+            pass
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            buffer = io.BytesIO()
+            np.savez(buffer, labels=np.array(self.labels), templates=self.templates)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(buffer.getvalue())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save glyph templates: {e}")
+
+    def segment(self, binary):
+        # Glyph boxes (x, width) left to right and the text's top/bottom, from dark-on-white OcrPreprocessor output
+        ink = (np.asarray(binary) < 128).astype(np.uint8)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=4)
+        boxes = sorted(tuple(stats[index]) for index in range(1, count) if stats[index][cv2.CC_STAT_AREA] >= self.min_area)
+        if not boxes:
+            return ink, [], 0, 0
+
+        glyphs = []
+        for x, y, width, height, _ in boxes:
+            # Pieces that share columns (dots, broken strokes) are one glyph
+            if glyphs and x < glyphs[-1][1]:
+                glyphs[-1][1] = max(glyphs[-1][1], x + width)
+            else:
+                glyphs.append([x, x + width])
+        top = min(box[1] for box in boxes)
+        bottom = max(box[1] + box[3] for box in boxes)
+        return ink, glyphs, top, bottom
+
+    def split(self, ink, glyph, top, bottom):
+        # Two glyphs cut at the column with the least ink in the middle of a wide one
+        left, right = glyph
+        width = right - left
+        middle = ink[top:bottom, left + width * 3 // 10:left + width * 7 // 10].sum(axis=0)
+        if middle.size == 0:
+            return [glyph]
+        cut = left + width * 3 // 10 + int(np.argmin(middle))
+        return [[left, cut], [cut, right]]
+
+    def wide(self, glyphs, glyph):
+        return glyph[1] - glyph[0] >= np.median([right - left for left, right in glyphs]) * self.split_ratio
+
+    def features(self, ink, glyphs, top, bottom):
+        height = max(bottom - top, 1)
+        vectors = np.empty((len(glyphs), self.templates.shape[1]), dtype=np.float32)
+        for index, (left, right) in enumerate(glyphs):
+            # Full text height, so a "." stays at the bottom and a "-" in the middle
+            glyph = ink[top:bottom, left:right].astype(np.float32)
+            vectors[index, :-1] = cv2.resize(glyph, GLYPH_SIZE, interpolation=cv2.INTER_AREA).ravel()
+            vectors[index, -1] = (right - left) / height
+        return vectors
+
+    def distances(self, vectors):
+        difference = np.abs(vectors[:, None, :] - self.templates[None, :, :])
+        return difference[:, :, :-1].mean(axis=2) + difference[:, :, -1]
+
+    def candidates(self, ink, glyphs, top, bottom):
+        # Set of characters each glyph could be, empty when it matches nothing
+        labels = np.array(self.labels)
+        options = []
+        for row in self.distances(self.features(ink, glyphs, top, bottom)):
+            limit = min(row.min() / self.ambiguity_ratio, self.max_distance)
+            options.append(set(labels[row <= limit]))
+        return options
+
+    def recognize(self, binary):
+        text = self.read(binary)
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return text
+
+    def read(self, binary):
+        if not self.labels:
+            return None
+        ink, glyphs, top, bottom = self.segment(binary)
+        if not glyphs:
+            return None
+
+        options = []
+        for glyph, chars in zip(glyphs, self.candidates(ink, glyphs, top, bottom)):
+            if not chars:
+                # Maybe two touching letters
+                if not self.wide(glyphs, glyph):
+                    return None
+                parts = self.split(ink, glyph, top, bottom)
+                chars = self.candidates(ink, parts, top, bottom)
+                if len(parts) != 2 or not all(chars):
+                    return None
+                options += chars
+            else:
+                options.append(chars)
+
+        if options and FRAME_CHARS[0] in options[0]:
+            options = options[1:]
+        if options and FRAME_CHARS[1] in options[-1]:
+            options = options[:-1]
+        return self.resolve(options)
+
+    def resolve(self, options):
+        matches = [word for core, word in self.words.items() if len(core) == len(options) and all(char in chars for char, chars in zip(core, options))]
+        if matches:
+            return matches[0] if len(matches) == 1 else None
+
+        if self.number_pattern is None:
+            return None
+        number = ""
+        for chars in options:
+            digits = [char for char in chars if char.isdigit() or char == "."]
+            if len(digits) != 1:
+                return None
+            number += digits[0]
+        return number if self.number_pattern.fullmatch(number) else None
+
+    def known(self, text, verified=False):
+        # Any string fits the number pattern, so a number only counts when the text is known to be right
+        core = self.core(text)
+        if core in self.words:
+            return True
+        return bool(verified and self.number_pattern and self.number_pattern.fullmatch(core))
+
+    def learn(self, binary, text, verified=False):
+        # Keeps the glyphs of a banner tesseract read as a known word, one per non-space character.
+        # verified is for labelled banners (training), their numbers are learned too
+        if self.frozen:
+            return False
+        chars = [char.upper() for char in text if not char.isspace()]
+        if not chars or not self.known(text, verified) or any(not (char.isalnum() or char in "." + FRAME_CHARS) for char in chars):
+            return False
+        ink, glyphs, top, bottom = self.segment(binary)
+        while glyphs and len(glyphs) < len(chars):
+            index = max(range(len(glyphs)), key=lambda index: glyphs[index][1] - glyphs[index][0])
+            if not self.wide(glyphs, glyphs[index]):
+                break
+            glyphs[index:index + 1] = self.split(ink, glyphs[index], top, bottom)
+        if len(glyphs) != len(chars):
+            return False
+
+        vectors = self.features(ink, glyphs, top, bottom)
+        distances = self.distances(vectors) if self.labels else None
+        labels = np.array(self.labels)
+        added = []
+        for index, char in enumerate(chars):
+            same = labels == char
+            if same.sum() + sum(label == char for label, _ in added) >= self.max_templates:
+                continue
+            if distances is not None and same.any() and distances[index][same].min() < self.novelty:
+                continue
+            added.append((char, vectors[index]))
+
+        if not added:
+            return True
+        self.labels += [char for char, _ in added]
+        self.templates = np.vstack([self.templates] + [vector[None, :] for _, vector in added])
+        self.learned += len(added)
+        self.save()
+        return True
+
+    def stats(self):
+        reads = self.hits + self.misses
+        return {
+            "templates": len(self.labels),
+            "characters": len(set(self.labels)),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / reads if reads else 0.0,
+            "learned": self.learned,
+        }
+
+
+if __name__ == "__main__":
+    # Train from banner crops named after their text, e.g. "WINDY.png" or "0.1428571429_2.png":
+    # python -m modules.glyph_recognizer folder [glyphs.npz]
+    from modules.ocr_preprocess import OcrPreprocessor
+    biome_names = ["Windy", "Rainy", "Snowy", "Sand Storm", "Hell", "Starfall", "Corruption", "Null", "Graveyard", "Pumpkin Moon"]
+    recognizer = GlyphRecognizer(biome_names, r"\d\.\d{8,}", sys.argv[2] if len(sys.argv) > 2 else None)
+    preprocessor = OcrPreprocessor.from_config({}, "Biome_Region")
+    for filename in sorted(os.listdir(sys.argv[1])):
+        if filename.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")):
+            text = os.path.splitext(filename)[0].rsplit("_", 1)[0]
+            image = cv2.cvtColor(cv2.imread(os.path.join(sys.argv[1], filename), cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+            binary = preprocessor(image)
+            # Crops are named without the frame, try with it first
+            if not recognizer.learn(binary, f"[ {text} ]", verified=True) and not recognizer.learn(binary, text, verified=True):
+                print(f"Skipped {filename}: glyphs don't line up with the text")
+    print(recognizer.stats())
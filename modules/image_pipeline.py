@@ -0,0 +1,50 @@
+import os
+import cv2
+import numpy as np
+from PIL import Image
+
+# Fast PNG settings, screenshots are uploaded right away so size matters less than encode time
+PNG_COMPRESSION = 1
+
+
+def encode_image(image, region=None, scale=1.0, compression=PNG_COMPRESSION):
+    # RGB array or PIL image -> PNG bytes, optionally cropped to (x, y, w, h) and downscaled first
+    if isinstance(image, Image.Image):
+        image = np.asarray(image.convert("RGB"))
+    image = np.asarray(image)
+
+    if region is not None:
+        x, y, w, h = (int(v) for v in region)
+        image = image[max(y, 0):max(y + h, 0), max(x, 0):max(x + w, 0)]
+    if scale and 0 < scale < 1:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    if image.ndim == 3:
+        image = cv2.cvtColor(image[:, :, :3], cv2.COLOR_RGB2BGR)
+    ok, encoded = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, compression])
+    if not ok:
+        raise ValueError("Could not encode image")
+    return encoded.tobytes()
+
+
+def image_file(filename, image_data):
+    # Multipart entry for requests' files=, referenced in embeds as attachment://filename
+    return (filename, image_data, "image/png")
+
+
+def archive_enabled(config):
+    # Screenshots only go to disk if the user asked for it
+    return bool(config.get("ImageArchive", False))
+
+
+def archive_image(image_data, path, enabled=True):
+    if not enabled:
+        return None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(image_data)
+        return path
+    except OSError as e:
+        print(f"Could not archive image {path}: {e}")
+        return None
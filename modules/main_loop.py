@@ -1,9 +1,16 @@
-import threading, time, win32gui, win32con, os, json, re, requests, pytesseract, concurrent.futures, pyautogui
+import threading, time, win32gui, win32con, os, json, re, requests, pytesseract, concurrent.futures
 import pygetwindow as gw
 from ahk import AHK
 from modules.aura_detector import AuraDetector
 from modules.record_path import RecordPath
 from modules.biome_detector import BiomeDetector
+from modules.frame_source import FrameSource
+from modules.capture_backends import create_capture_backend
+from modules.ocr_engine import get_ocr_engine
+from modules.ocr_preprocess import OcrPreprocessor
+from modules.image_pipeline import encode_image, image_file, archive_enabled, archive_image
+from modules.config_store import get_config_store
+from modules.path_index import get_path_index
 
 ahk = AHK(executable_path=r"C:\Program Files\AutoHotkey\AutoHotkey.exe")
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
@@ -13,16 +20,23 @@ print("Current working directory:", os.getcwd())
 class MacroLoop:
     BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'MAIN_PATHS'))
     
-    def __init__(self):
+    def __init__(self, capture_backend=None):
         self.running = threading.Event()
         self.thread = None
         self.aura_detector_running = threading.Event()
         self.aura_detector_thread = None
-        self.aura_detector = AuraDetector()
+        # config.json parsed once for every routine, re-read only when the file changes
+        self.config = get_config_store()
+        # One screen capture per tick, shared by the detectors and the merchant/inventory routines
+        if capture_backend is None:
+            capture_backend = create_capture_backend(self.config.get("CaptureBackend", "pyautogui"), self.config.get("CaptureReplayPath"))
+        self.frame_source = FrameSource(capture_backend)
+        self.aura_detector = AuraDetector(frame_source=self.frame_source)
         
         self.biome_detector_running = threading.Event()
         self.biome_detector_thread = None
-        self.biome_detector = BiomeDetector(self.biome_detector_running)
+        self.biome_detector = BiomeDetector(self.biome_detector_running, frame_source=self.frame_source)
+        self.ocr_engine = get_ocr_engine()
         
         self.original_resolution = (1920, 1080)
         
@@ -42,6 +56,8 @@ class MacroLoop:
         
         # Sub-paths replay
         self.record_path_instance = RecordPath(running_event=self.running)
+        # Recordings under MAIN_PATHS, found without walking the folder on every cycle
+        self.path_index = get_path_index(self.BASE_PATH)
         self.subpaths_count = 8  # Total number of subpaths
         self.paths_per_subpath = 5  # Number of paths within each subpath
         
@@ -58,26 +74,34 @@ class MacroLoop:
         self.one_time_stats_update = False
     
     def get_subpath_json(self, subpath_index, small_path_num):
-        sub_path_folder = os.path.join(self.BASE_PATH, "EON1_New", f"EON1_SubPath{subpath_index}")
         json_filename = f"path_{small_path_num}_record.json"
-        json_path = os.path.join(sub_path_folder, json_filename)
-
-        if not os.path.exists(json_path):
-            json_path = self.find_file(json_filename, self.BASE_PATH)
-            if not json_path:
-                raise FileNotFoundError(f"Macro subpath not found: {json_filename} in {self.BASE_PATH}")
+        # The Record Path window numbers paths 1-40 across sub-paths, path 2 of sub-path 3 is path_12
+        global_path_num = (subpath_index - 1) * self.paths_per_subpath + small_path_num
+        json_path = (
+            self.path_index.subpath(subpath_index, small_path_num)
+            or self.path_index.subpath(subpath_index, global_path_num)
+        )
+        if not json_path and subpath_index == 1:
+            # Loose path_N_record.json files outside a SubPath folder can only mean sub-path 1, any other
+            # sub-path would replay sub-path 1's paths from the wrong place
+            json_path = self.path_index.find(json_filename)
+        if not json_path:
+            raise FileNotFoundError(f"Macro subpath not found: path {small_path_num} of sub-path {subpath_index} in {self.BASE_PATH}")
             
         return json_path
-    
-    def find_file(self, filename, search_folder=None):
-        if not search_folder:
-            search_folder = os.getcwd()
-
-        for root, _, files in os.walk(search_folder):
-            if filename in files:
-                return os.path.join(root, filename)
 
-        return None
+    def preload_recordings(self, enabled_subpaths):
+        # Every path this run can replay, compiled before the loop so no replay waits on the disk
+        paths = []
+        for subpath_index in enabled_subpaths:
+            for small_path_num in range(1, self.paths_per_subpath + 1):
+                try:
+                    paths.append(self.get_subpath_json(subpath_index, small_path_num))
+                except FileNotFoundError:
+                    continue
+        paths += [path for path in (self.path_index.misc("obby"), self.path_index.misc("potion")) if path]
+        loaded = self.record_path_instance.preload(paths)
+        print(f"Preloaded {loaded} recordings")
 
     def macro_click(self, x, y):
         ahk.mouse_move(x, y)
@@ -87,8 +111,7 @@ class MacroLoop:
 
     def send_webhook_status(self, status, color=None, inv_screenshots=False):
         try:
-            with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-                config = json.load(config_file)
+            config = self.config.snapshot()
 
             if config.get("Webhook_Enabled", 0) != 1:
                 return
@@ -102,7 +125,6 @@ class MacroLoop:
             default_color = 3066993 if "started" in status.lower() else 15158332
             embed_color = color if color is not None else default_color
             screenshot_path = os.path.expandvars("%appdata%/DSIM/images/macro_inv_ss.png")
-            os.makedirs("images", exist_ok=True)
 
 
             if inv_screenshots:
@@ -147,15 +169,15 @@ class MacroLoop:
                                 time.sleep(0.25)
 
 
-                            screenshot = pyautogui.screenshot()
-                            cropped_screenshot = screenshot.crop((
+                            cropped_screenshot = self.frame_source.get_region((
                                 roblox_left,
                                 roblox_top + 25,
-                                roblox_left + (roblox_width - 50),
-                                roblox_top + (roblox_height - 50)
-                            ))
+                                roblox_width - 50,
+                                roblox_height - 75
+                            ), max_age=0)
                             
-                            cropped_screenshot.save(screenshot_path)
+                            image_data = encode_image(cropped_screenshot)
+                            archive_image(image_data, screenshot_path, archive_enabled(config))
 
                             embeds = [{
                                 "title": f"{title}",
@@ -168,15 +190,14 @@ class MacroLoop:
                             }]
 
 
-                            with open(screenshot_path, "rb") as image_file:
-                                files = {"file": (os.path.basename(screenshot_path), image_file, "image/png")}
-                                response = requests.post(
-                                    webhook_url,
-                                    data={"payload_json": json.dumps({"embeds": embeds})},
-                                    files=files
-                                )
-                                response.raise_for_status()
-                                print(f"Webhook sent successfully for {title}: {response.status_code}")
+                            files = {"file": image_file(os.path.basename(screenshot_path), image_data)}
+                            response = requests.post(
+                                webhook_url,
+                                data={"payload_json": json.dumps({"embeds": embeds})},
+                                files=files
+                            )
+                            response.raise_for_status()
+                            print(f"Webhook sent successfully for {title}: {response.status_code}")
 
                         except Exception as e:
                             print(f"Error capturing or sending screenshot for {title}: {e}")
@@ -207,9 +228,8 @@ class MacroLoop:
             print(f"An error occurred in send_webhook_status: {e}")
     
 
-    def send_merchant_webhook(self, merchant_name, screenshot_path):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-            config = json.load(config_file)
+    def send_merchant_webhook(self, merchant_name, image_data, image_name="merchant_screenshot.png"):
+        config = self.config.snapshot()
 
         merchant_webhooks = config.get("Merchant_Webhook", [])
         
@@ -237,24 +257,23 @@ class MacroLoop:
                 "title": f"{merchant_name} Detected!",
                 "description": f"{merchant_name} has been detected on your screen.\n**Item screenshot**\n \nMerchant PS Link: {ps_link}",
                 "color": 11753 if merchant_name == "Mari" else 8595632,
-                "image": {"url": f"attachment://{os.path.basename(screenshot_path)}"},
+                "image": {"url": f"attachment://{image_name}"},
                 "thumbnail": {"url": merchant_thumbnails.get(merchant_name, "")}
             }]
 
-            with open(screenshot_path, "rb") as image_file:
-                files = {"file": (os.path.basename(screenshot_path), image_file, "image/png")}
-                response = requests.post(
-                    webhook_url,
-                    data={
-                        "payload_json": json.dumps({
-                            "content": content,
-                            "embeds": embeds
-                        })
-                    },
-                    files=files
-                )
-                response.raise_for_status()
-                print(f"Webhook sent successfully for {merchant_name} to {webhook['alias']}: {response.status_code}")
+            files = {"file": image_file(image_name, image_data)}
+            response = requests.post(
+                webhook_url,
+                data={
+                    "payload_json": json.dumps({
+                        "content": content,
+                        "embeds": embeds
+                    })
+                },
+                files=files
+            )
+            response.raise_for_status()
+            print(f"Webhook sent successfully for {merchant_name} to {webhook['alias']}: {response.status_code}")
 
         # send webhooks in threads (yes, I know)
         with concurrent.futures.ThreadPoolExecutor() as executor:
@@ -303,14 +322,13 @@ class MacroLoop:
     
     def check_obby_path(self):
         try:
-            with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-                config = json.load(config_file)
+            config = self.config.snapshot()
 
             if config.get("DoObby") == 1:
                 current_time = time.time()
 
                 if current_time - self.last_obby_run >= self.obby_cooldown:
-                    obby_json_path = self.find_file("obby_path_record.json", self.BASE_PATH)
+                    obby_json_path = self.path_index.misc("obby")
                     
                     if obby_json_path:
                         print("Starting obby path...")
@@ -342,8 +360,7 @@ class MacroLoop:
 
     def potion_crafting_loop(self):
         try:
-            with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-                config = json.load(config_file)
+            config = self.config.snapshot()
 
             if not config.get("AutomaticPotionCrafting", False): return
 
@@ -355,7 +372,7 @@ class MacroLoop:
                 self.slot_craft_timestamps = {slot: 0 for slot in crafting_slots}
 
             # Find and load the potion path
-            potion_json_path = self.find_file("potion_path_record.json", self.BASE_PATH)
+            potion_json_path = self.path_index.misc("potion")
             if not potion_json_path: return
 
             if self.running.is_set():
@@ -570,8 +587,7 @@ class MacroLoop:
 
                     
     def use_item_scheduler(self):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-            config = json.load(config_file)
+        config = self.config.snapshot()
 
         current_time = time.time()
         item_scheduler = config.get("item_scheduler", [])
@@ -619,9 +635,14 @@ class MacroLoop:
                 self.Merchant_Handler()
 
 
+    def click_item_slot(self, first_item_slot_pos, slot_index):
+        x, y = first_item_slot_pos
+        slot_x = x + (slot_index * 185)
+        ahk.click(slot_x, y, button="left", coord_mode="Screen", click_count=2)
+        time.sleep(0.35)
+
     def Merchant_Handler(self):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-            config = json.load(config_file)
+        config = self.config.snapshot()
 
         merchant_name_ocr_pos = config["merchant_name_ocr_pos"]
         merchant_open_button = config["merchant_open_button"]
@@ -646,13 +667,15 @@ class MacroLoop:
             time.sleep(0.3)
             
         self.ahk_hold_left_click(merchant_dialogue_box[0], merchant_dialogue_box[1], holdTime=2500)
+
+        name_preprocessor = OcrPreprocessor.from_config(config, "merchant_name_ocr_pos")
+        item_preprocessor = OcrPreprocessor.from_config(config, "item_name_ocr_pos")
             
         for _ in range(5):
             if not self.running.is_set(): return
             
-            x, y, w, h = merchant_name_ocr_pos
-            screenshot = pyautogui.screenshot(region=(x, y, w, h))
-            merchant_name_text = pytesseract.image_to_string(screenshot)
+            screenshot = self.frame_source.get_region(merchant_name_ocr_pos, max_age=0)
+            merchant_name_text = self.ocr_engine.image_to_string(name_preprocessor(screenshot))
             
             if any(name in merchant_name_text for name in ["Mori", "Marl", "Mar1", "MarI", "Mar!", "Maori"]):
                 merchant_name = "Mari"
@@ -676,11 +699,12 @@ class MacroLoop:
             time.sleep(0.73)
 
             # Take a screenshot for the webhook
-            item_screenshot = pyautogui.screenshot()
+            item_screenshot = self.frame_source.get_frame(max_age=0)
             screenshot_path = os.path.expandvars("%appdata%/DSIM/images/merchant_screenshot.png")
-            item_screenshot.save(screenshot_path)
+            image_data = encode_image(item_screenshot)
+            archive_image(image_data, screenshot_path, archive_enabled(config))
             
-            self.send_merchant_webhook(merchant_name, screenshot_path)
+            self.send_merchant_webhook(merchant_name, image_data, os.path.basename(screenshot_path))
 
             auto_buy_items = config.get(f"{merchant_name}_AutoBuyItems", {})
             if not auto_buy_items:
@@ -688,19 +712,21 @@ class MacroLoop:
 
             purchased_items = set()
 
-            # Loop through item slots
+            # Capture every slot's item name first, then read all of them in one OCR call
+            item_regions = []
             for slot_index in range(5):
                 if not self.running.is_set(): return
                 
-                x, y = first_item_slot_pos
-                slot_x = x + (slot_index * 185)
-                ahk.click(slot_x, y, button="left", coord_mode="Screen", click_count=2)
-                time.sleep(0.35)
+                self.click_item_slot(first_item_slot_pos, slot_index)
+                screenshot = self.frame_source.get_region(item_name_ocr_pos, max_age=0)
+                item_regions.append(item_preprocessor(screenshot))
+
+            item_texts = self.ocr_engine.image_to_strings(item_regions, config='--psm 6')
+
+            for slot_index, item_text in enumerate(item_texts):
+                if not self.running.is_set(): return
 
-                # OCR - item name
-                x, y, w, h = item_name_ocr_pos
-                screenshot = pyautogui.screenshot(region=(x, y, w, h))
-                item_text = pytesseract.image_to_string(screenshot, config='--psm 6').strip().lower()
+                item_text = item_text.strip().lower()
                 normalized_item_text = item_text.replace("1", "i").replace("2", "ii").replace("3", "iii").replace("|", "i").strip()
 
                 # mari "geor" -> "gear" (gear a/b typo)
@@ -720,6 +746,9 @@ class MacroLoop:
                         purchase_amount_button = config["purchase_amount_button"]
                         purchase_button = config["purchase_button"]
 
+                        # The last captured slot is still selected, go back to this one
+                        self.click_item_slot(first_item_slot_pos, slot_index)
+
                         ahk.click(*purchase_amount_button, button="left", coord_mode="Screen")
                         ahk.send_input(str(quantity))
                         time.sleep(0.25)
@@ -777,6 +806,21 @@ class MacroLoop:
             if self.biome_detector_thread is not None:
                 self.biome_detector_thread.join(timeout=2)
                 self.biome_detector_thread = None
+
+        print(f"Detector and capture stats: {self.get_detector_stats()}")
+
+    def get_detector_stats(self):
+        return {
+            "aura": self.aura_detector.frame_gate.stats(),
+            "biome": self.biome_detector.frame_gate.stats(),
+            "biome_polling": self.biome_detector.poll_scheduler.stats(),
+            "biome_glyphs": self.biome_detector.glyph_recognizer.stats() if self.biome_detector.glyph_recognizer else None,
+            "frame_source": self.frame_source.stats(),
+            "aura_webhooks": self.aura_detector.webhook_queue.stats(),
+            "ocr": self.ocr_engine.stats(),
+            "recordings": self.record_path_instance.recording_cache.stats(),
+            "replay": self.record_path_instance.last_trace.stats() if self.record_path_instance.last_trace else None,
+        }
                 
 
     def get_roblox_window_resolution(self):
@@ -811,8 +855,7 @@ class MacroLoop:
 
     
     def equipAura(self, aura_name="Glock"):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-            config = json.load(config_file)
+        config = self.config.snapshot()
 
         aura_storage_coords = config.get("aura_storage_coords", [0, 0])
         search_bar_coords = config.get("search_bar_coords", [0, 0])
@@ -866,8 +909,7 @@ class MacroLoop:
         ahk.click(aura_storage_coords[0], aura_storage_coords[1], coord_mode="Screen")
 
     def collection_align(self):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-            config = json.load(config_file)
+        config = self.config.snapshot()
 
         collection_button_coords = config.get("collection_button_coords", [0, 0])
         collection_back_button_coords = config.get("collection_back_button_coords", [0, 0])
@@ -890,8 +932,7 @@ class MacroLoop:
           
         
     def Inventory(self, item_name="Strange Controller", amount=1):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-            config = json.load(config_file)
+        config = self.config.snapshot()
 
         self.inv_menu_coords = config.get("inv_menu_coords", [0, 0])
         self.inv_item_tab_coords = config.get("inv_itemtab_button_coords", [0, 0])
@@ -938,8 +979,7 @@ class MacroLoop:
         time.sleep(0.2)
     
     def Quest(self):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-            config = json.load(config_file)
+        config = self.config.snapshot()
 
         quest_menu_coords = config.get("quest_menu_coords", [0, 0])
         quest_dailytab_coords = config.get("quest_dailytab_coords", [0, 0])
@@ -985,8 +1025,7 @@ class MacroLoop:
         
     def macro_periodical_screenshot(self):
         try:
-            with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-                config = json.load(config_file)
+            config = self.config.snapshot()
 
             if not config.get("WebhookInventory", False):
                 return
@@ -1015,8 +1054,7 @@ class MacroLoop:
 
             
     def loop_process(self):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-            config = json.load(config_file)
+        config = self.config.snapshot()
 
         collect_items_enabled = config.get("CollectItems", 0) == 1
 
@@ -1024,6 +1062,8 @@ class MacroLoop:
             index + 1 for index, is_enabled in enumerate(config["Sub_ItemSpot"]) if is_enabled == 1
         ]
 
+        self.preload_recordings(enabled_subpaths if collect_items_enabled else [])
+
         ## ~ALIGNMENT ##
         self.get_roblox_window_resolution()
         time.sleep(1.5)
@@ -1053,6 +1093,7 @@ class MacroLoop:
                             self.record_path_instance.replay_actions()
                             
                         except FileNotFoundError as e:
+                            print(e)
                             continue
                         
                         # reset
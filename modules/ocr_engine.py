@@ -0,0 +1,407 @@
+import ctypes, ctypes.util, glob, hashlib, os, queue, re, shutil, threading, time
+from collections import OrderedDict
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+
+# Same as the tesseract command line, which is what pytesseract runs
+DEFAULT_PSM = 3
+# tesseract assumes 70 dpi for images without a resolution, set it so the results match pytesseract
+DEFAULT_DPI = 70
+# PageIteratorLevel of a text line in the C API
+RIL_TEXTLINE = 2
+
+
+def find_tesseract_library(tesseract_cmd=None):
+    # libtesseract ships next to tesseract.exe in the Windows installer, elsewhere ask the loader
+    tesseract_cmd = tesseract_cmd or pytesseract.pytesseract.tesseract_cmd
+    command_path = tesseract_cmd if os.path.isabs(tesseract_cmd) else shutil.which(tesseract_cmd)
+    if command_path:
+        install_dir = os.path.dirname(command_path)
+        for pattern in ("libtesseract*.dll", "tesseract*.dll"):
+            matches = sorted(glob.glob(os.path.join(install_dir, pattern)))
+            if matches:
+                return matches[-1], install_dir
+    return ctypes.util.find_library("tesseract"), None
+
+
+class TesseractAPI:
+    # Thin ctypes binding over the tesseract C API, one instance is one loaded engine
+    def __init__(self, library, data_dir, lang):
+        self.library = library
+        self.handle = library.TessBaseAPICreate()
+        if library.TessBaseAPIInit3(self.handle, data_dir.encode() if data_dir else None, lang.encode()) != 0:
+            library.TessBaseAPIDelete(self.handle)
+            raise RuntimeError(f"Could not initialize tesseract with language '{lang}' from {data_dir or 'the default tessdata folder'}")
+        # pytesseract swallowed tesseract's stderr chatter ("Estimating resolution as ..."), keep it quiet here too
+        library.TessBaseAPISetVariable(self.handle, b"debug_file", os.devnull.encode())
+
+    def set_image(self, image, psm):
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        self.library.TessBaseAPISetPageSegMode(self.handle, psm)
+        self.library.TessBaseAPISetImage(self.handle, image.ctypes.data_as(ctypes.c_void_p), width, height, channels, width * channels)
+        self.library.TessBaseAPISetSourceResolution(self.handle, DEFAULT_DPI)
+
+    def clear(self):
+        self.library.TessBaseAPIClear(self.handle)
+        # The adaptive classifier learns from every page, a fresh tesseract process (pytesseract) never does.
+        # Reset it so a read doesn't depend on what was read before
+        self.library.TessBaseAPIClearAdaptiveClassifier(self.handle)
+
+    def take_text(self, text_pointer):
+        if not text_pointer:
+            return ""
+        try:
+            return ctypes.string_at(text_pointer).decode("utf-8", errors="replace")
+        finally:
+            self.library.TessDeleteText(text_pointer)
+
+    def image_to_string(self, image, psm):
+        self.set_image(image, psm)
+        try:
+            return self.take_text(self.library.TessBaseAPIGetUTF8Text(self.handle))
+        finally:
+            self.clear()
+
+    def image_to_lines(self, image, psm):
+        # Every recognized text line as (top, bottom, text), in image coordinates
+        self.set_image(image, psm)
+        lines = []
+        iterator = None
+        try:
+            if self.library.TessBaseAPIRecognize(self.handle, None) != 0:
+                return lines
+            iterator = self.library.TessBaseAPIGetIterator(self.handle)
+            if not iterator:
+                return lines
+            page_iterator = self.library.TessResultIteratorGetPageIterator(iterator)
+            left, top, right, bottom = (ctypes.c_int() for _ in range(4))
+            while True:
+                if self.library.TessPageIteratorBoundingBox(page_iterator, RIL_TEXTLINE, ctypes.byref(left), ctypes.byref(top), ctypes.byref(right), ctypes.byref(bottom)):
+                    text = self.take_text(self.library.TessResultIteratorGetUTF8Text(iterator, RIL_TEXTLINE))
+                    lines.append((top.value, bottom.value, text))
+                if not self.library.TessResultIteratorNext(iterator, RIL_TEXTLINE):
+                    break
+            return lines
+        finally:
+            if iterator:
+                self.library.TessResultIteratorDelete(iterator)
+            self.clear()
+
+    def close(self):
+        self.library.TessBaseAPIEnd(self.handle)
+        self.library.TessBaseAPIDelete(self.handle)
+
+
+class OcrCache:
+    # LRU of OCR results keyed by the exact pixels (and options) handed to tesseract
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, image, config):
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+        digest.update(f"{image.shape}|{config}".encode())
+        return digest.digest()
+
+    def get(self, key):
+        with self.lock:
+            text = self.entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text):
+        with self.lock:
+            self.entries[key] = text
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class OcrEngine:
+    # Keeps tesseract engines loaded in process instead of starting tesseract.exe for every read
+    # Engines aren't thread safe, so each call borrows one from a small pool. Without libtesseract
+    # (or for tesseract options other than --psm) it falls back to pytesseract
+    # Results are cached by pixel content, an identical region never reaches tesseract twice
+    def __init__(self, lang="eng", pool_size=2, tesseract_cmd=None, cache_size=256):
+        self.lang = lang
+        self.pool_size = pool_size
+        self.tesseract_cmd = tesseract_cmd
+        self.lock = threading.Lock()
+        self.pool = queue.Queue()
+        self.created = 0
+        self.library = None
+        self.data_dir = None
+        self.load_failed = False
+        self.cache = OcrCache(cache_size)
+
+        self.in_process_calls = 0
+        # Regions that were read as part of a stitched batch
+        self.batched_regions = 0
+        self.fallback_calls = 0
+        self.total_time = 0.0
+
+    def load_library(self):
+        library_path, install_dir = find_tesseract_library(self.tesseract_cmd)
+        if not library_path:
+            raise OSError("libtesseract not found")
+        if install_dir and hasattr(os, "add_dll_directory"):
+            # The dll depends on the leptonica and friends next to it
+            os.add_dll_directory(install_dir)
+
+        library = ctypes.CDLL(library_path)
+        library.TessBaseAPICreate.restype = ctypes.c_void_p
+        library.TessBaseAPIInit3.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        library.TessBaseAPISetVariable.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        library.TessBaseAPISetPageSegMode.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        library.TessBaseAPISetImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        library.TessBaseAPISetSourceResolution.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        library.TessBaseAPIGetUTF8Text.argtypes = [ctypes.c_void_p]
+        library.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+        library.TessDeleteText.argtypes = [ctypes.c_void_p]
+        library.TessBaseAPIRecognize.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        library.TessBaseAPIGetIterator.argtypes = [ctypes.c_void_p]
+        library.TessBaseAPIGetIterator.restype = ctypes.c_void_p
+        library.TessResultIteratorGetPageIterator.argtypes = [ctypes.c_void_p]
+        library.TessResultIteratorGetPageIterator.restype = ctypes.c_void_p
+        library.TessPageIteratorBoundingBox.argtypes = [ctypes.c_void_p, ctypes.c_int] + [ctypes.POINTER(ctypes.c_int)] * 4
+        library.TessResultIteratorGetUTF8Text.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        library.TessResultIteratorGetUTF8Text.restype = ctypes.c_void_p
+        library.TessResultIteratorNext.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        library.TessResultIteratorDelete.argtypes = [ctypes.c_void_p]
+        for name in ("TessBaseAPIClear", "TessBaseAPIClearAdaptiveClassifier", "TessBaseAPIEnd", "TessBaseAPIDelete"):
+            getattr(library, name).argtypes = [ctypes.c_void_p]
+
+        self.library = library
+        self.data_dir = self.find_data_dir(install_dir)
+
+    def find_data_dir(self, install_dir):
+        # Init3 wants the folder holding <lang>.traineddata, the installer puts it in tessdata next to tesseract.exe
+        if os.environ.get("TESSDATA_PREFIX"):
+            return os.environ["TESSDATA_PREFIX"]
+        if install_dir and os.path.isdir(os.path.join(install_dir, "tessdata")):
+            return os.path.join(install_dir, "tessdata")
+        return install_dir
+
+    def disable(self, reason):
+        # Once, every read after this goes through pytesseract
+        self.load_failed = True
+        print(f"In-process OCR unavailable, falling back to pytesseract (one tesseract.exe run per read): {reason}")
+
+    def acquire(self):
+        # An idle engine, a new one while the pool isn't full, otherwise wait for one
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            if self.library is None and not self.load_failed:
+                try:
+                    self.load_library()
+                except (OSError, AttributeError) as e:
+                    self.disable(e)
+            if self.load_failed:
+                return None
+            if self.created < self.pool_size:
+                try:
+                    api = TesseractAPI(self.library, self.data_dir, self.lang)
+                except RuntimeError as e:
+                    self.disable(e)
+                    return None
+                self.created += 1
+                return api
+        return self.pool.get()
+
+    def parse_config(self, config):
+        # Only --psm N can be applied to a pooled engine, None means use pytesseract for this config
+        config = (config or "").strip()
+        if not config:
+            return DEFAULT_PSM
+        match = re.fullmatch(r"--psm\s+(\d+)", config)
+        return int(match.group(1)) if match else None
+
+    def to_array(self, image):
+        # Contiguous 8-bit gray or RGB pixels, the layout SetImage expects
+        if isinstance(image, Image.Image):
+            if image.mode not in ("L", "RGB"):
+                image = image.convert("RGB")
+            image = np.asarray(image)
+        image = np.asarray(image)
+        if image.ndim == 3 and image.shape[2] == 4:
+            image = image[:, :, :3]
+        return np.ascontiguousarray(image, dtype=np.uint8)
+
+    def fallback(self, image, config):
+        self.fallback_calls += 1
+        return pytesseract.image_to_string(Image.fromarray(image), config=config or "")
+
+    def image_to_string(self, image, config=""):
+        # Same call shape as pytesseract.image_to_string, takes a PIL image or an RGB / gray array
+        image = self.to_array(image)
+        key = self.cache.key(image, config)
+        text = self.cache.get(key)
+        if text is not None:
+            return text
+
+        start = time.perf_counter()
+        try:
+            text = self.recognize(image, config)
+        finally:
+            self.total_time += time.perf_counter() - start
+        self.cache.put(key, text)
+        return text
+
+    def image_to_strings(self, images, config="", separator=24):
+        # Several regions read in one tesseract pass: stacked top to bottom on white with a gap between them,
+        # each recognized line goes back to the region its box sits in. Only binarized (dark text on white)
+        # regions are stitched, gray ones on a white canvas don't read like they do alone and are read one by one.
+        # Returns one string per image, cached per region like image_to_string
+        arrays = [self.to_array(image) for image in images]
+        keys = [self.cache.key(array, config) for array in arrays]
+        texts = [self.cache.get(key) for key in keys]
+        missing = [index for index, text in enumerate(texts) if text is None]
+        if len(missing) == 1 or not all(self.is_binary(arrays[index]) for index in missing):
+            for index in missing:
+                texts[index] = self.image_to_string(arrays[index], config)
+            return texts
+        if not missing:
+            return texts
+
+        stitched, bands = self.stitch([arrays[index] for index in missing], separator)
+        start = time.perf_counter()
+        try:
+            lines = self.recognize_lines(stitched, config)
+        finally:
+            self.total_time += time.perf_counter() - start
+        self.batched_regions += len(missing)
+
+        region_lines = [[] for _ in missing]
+        for top, bottom, text in lines:
+            center = (top + bottom) / 2
+            for band_index, (band_top, band_bottom) in enumerate(bands):
+                if band_top <= center < band_bottom:
+                    region_lines[band_index].append(text.rstrip("\n"))
+                    break
+
+        for band_index, index in enumerate(missing):
+            text = "\n".join(region_lines[band_index])
+            if text:
+                text += "\n"
+            texts[index] = text
+            self.cache.put(keys[index], text)
+        return texts
+
+    def is_binary(self, array):
+        return array.ndim == 2 and not np.count_nonzero((array != 0) & (array != 255))
+
+    def stitch(self, arrays, separator):
+        # Stacked gray image and the (top, bottom) band that belongs to each region, gaps split halfway
+        grays = [array if array.ndim == 2 else cv2.cvtColor(array, cv2.COLOR_RGB2GRAY) for array in arrays]
+        width = max(gray.shape[1] for gray in grays) + separator * 2
+        height = sum(gray.shape[0] for gray in grays) + separator * (len(grays) + 1)
+        stitched = np.full((height, width), 255, dtype=np.uint8)
+
+        bands = []
+        y = separator
+        for gray in grays:
+            stitched[y:y + gray.shape[0], separator:separator + gray.shape[1]] = gray
+            bands.append((y - separator // 2, y + gray.shape[0] + separator // 2))
+            y += gray.shape[0] + separator
+        return stitched, bands
+
+    def recognize_lines(self, image, config):
+        psm = self.parse_config(config)
+        api = self.acquire() if psm is not None else None
+        if api is None:
+            self.fallback_calls += 1
+            return self.fallback_lines(image, config)
+
+        try:
+            lines = api.image_to_lines(image, psm)
+            self.in_process_calls += 1
+            return lines
+        finally:
+            self.pool.put(api)
+
+    def fallback_lines(self, image, config):
+        # Word boxes from pytesseract grouped back into lines
+        data = pytesseract.image_to_data(Image.fromarray(image), config=config or "", output_type=pytesseract.Output.DICT)
+        lines = {}
+        for index, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            line_key = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+            top, bottom = data["top"][index], data["top"][index] + data["height"][index]
+            line = lines.setdefault(line_key, [top, bottom, []])
+            line[0], line[1] = min(line[0], top), max(line[1], bottom)
+            line[2].append(word)
+        return [(top, bottom, " ".join(words)) for top, bottom, words in lines.values()]
+
+    def recognize(self, image, config):
+        psm = self.parse_config(config)
+        api = self.acquire() if psm is not None else None
+        if api is None:
+            return self.fallback(image, config)
+
+        try:
+            text = api.image_to_string(image, psm)
+            self.in_process_calls += 1
+            return text
+        finally:
+            self.pool.put(api)
+
+    def stats(self):
+        calls = self.in_process_calls + self.fallback_calls
+        return {
+            "engines": self.created,
+            "in_process_calls": self.in_process_calls,
+            "fallback_calls": self.fallback_calls,
+            "batched_regions": self.batched_regions,
+            "mean_ms": self.total_time / calls * 1000 if calls else None,
+            "cache": self.cache.stats(),
+        }
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self.lock:
+            self.created = 0
+
+
+shared_engine = None
+shared_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    # One engine pool for the whole process, the biome detector and the merchant OCR both read through it
+    global shared_engine
+    with shared_engine_lock:
+        if shared_engine is None:
+            shared_engine = OcrEngine()
+        return shared_engine
@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+
+# Per region defaults, any key can be overridden in config.json under "OcrPreprocess": {"<region key>": {...}}
+# White in-game text: keep only pixels far brighter than their surroundings, at 2x
+REGION_DEFAULTS = {
+    # The contrast/brightness the biome banner always had, plus upscale, binarize and trim
+    "Biome_Region": {"contrast": 1.65, "brightness": 1.05, "scale": 2, "threshold": "adaptive", "trim": True},
+    # Gray and upscale only: the merchant name and item checks in Merchant_Handler were tuned on raw tesseract reads,
+    # binarizing can be turned on per region under OcrPreprocess once checked on real merchant captures
+    "merchant_name_ocr_pos": {"scale": 2, "threshold": None},
+    "item_name_ocr_pos": {"scale": 2, "threshold": None},
+}
+
+
+class OcrPreprocessor:
+    # Turns an RGB region into what tesseract reads best: dark text on white, upscaled, cropped to the text
+    def __init__(self, contrast=1.0, brightness=1.0, scale=1, threshold=None, block_size=61, offset=60, invert=True, trim=False, padding=8):
+        self.contrast = contrast
+        self.brightness = brightness
+        # Integer factor, 1 keeps the size
+        self.scale = max(int(scale), 1)
+        # None (gray, tesseract binarizes itself), "adaptive" or "otsu"
+        self.threshold = threshold
+        # Adaptive: a pixel is text if it's offset levels brighter than the mean of its block_size neighbourhood
+        self.block_size = block_size | 1
+        self.offset = offset
+        # Game text is light on a darker background, invert the binary image so it comes out black
+        self.invert = invert
+        self.trim = trim
+        self.padding = padding
+        # Contrast pivots on the mean gray level (like PIL's ImageEnhance), one LUT per rounded mean
+        self.luts = {}
+
+    @classmethod
+    def from_config(cls, config, region_key):
+        options = dict(REGION_DEFAULTS.get(region_key, {}))
+        options.update(config.get("OcrPreprocess", {}).get(region_key, {}))
+        return cls(**options)
+
+    def lut(self, mean):
+        table = self.luts.get(mean)
+        if table is None:
+            # Truncated after each step like PIL's blend, so the output matches it to the pixel
+            values = np.arange(256, dtype=np.float32)
+            values = np.clip(np.trunc(mean + (values - mean) * np.float32(self.contrast)), 0, 255)
+            table = np.clip(np.trunc(values * np.float32(self.brightness)), 0, 255).astype(np.uint8)
+            self.luts[mean] = table
+        return table
+
+    def enhance(self, image):
+        # Contrast and brightness in one table lookup, same result as the two ImageEnhance passes
+        image = np.asarray(image)
+        if self.contrast == 1 and self.brightness == 1:
+            return image
+        if image.ndim == 2:
+            gray = image
+        else:
+            # PIL's fixed point RGB -> L, cv2's rounding shifts the mean on some images
+            rgb = image[:, :, :3].astype(np.uint32)
+            gray = (rgb[:, :, 0] * 19595 + rgb[:, :, 1] * 38470 + rgb[:, :, 2] * 7471 + 0x8000) >> 16
+        return cv2.LUT(image, self.lut(int(gray.mean() + 0.5)))
+
+    def finish(self, image):
+        # Gray, upscale, binarize and trim an already enhanced image
+        image = np.asarray(image)
+        gray = image if image.ndim == 2 else cv2.cvtColor(image[:, :, :3], cv2.COLOR_RGB2GRAY)
+        if self.scale > 1:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_CUBIC)
+
+        if self.threshold is None:
+            return gray
+
+        mode = cv2.THRESH_BINARY_INV if self.invert else cv2.THRESH_BINARY
+        if self.threshold == "otsu":
+            _, binary = cv2.threshold(gray, 0, 255, mode | cv2.THRESH_OTSU)
+        else:
+            binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, mode, self.block_size, -self.offset if self.invert else self.offset)
+
+        if self.trim:
+            binary = self.trim_to_text(binary)
+        return binary
+
+    def trim_to_text(self, binary):
+        # Crop to the bounding box of the dark (text) pixels, keeping a white margin tesseract likes
+        points = cv2.findNonZero(255 - binary)
+        if points is None:
+            return binary
+        x, y, w, h = cv2.boundingRect(points)
+        cropped = binary[y:y + h, x:x + w]
+        return cv2.copyMakeBorder(cropped, self.padding, self.padding, self.padding, self.padding, cv2.BORDER_CONSTANT, value=255)
+
+    def __call__(self, image):
+        return self.finish(self.enhance(image))
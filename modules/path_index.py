@@ -0,0 +1,101 @@
+import os, re, threading, time
+
+PATH_FILE_PATTERN = re.compile(r"^path_(\d+)_record\.json$", re.IGNORECASE)
+MISC_FILE_PATTERN = re.compile(r"^(\w+?)_path_record\.json$", re.IGNORECASE)
+SUBPATH_FOLDER_PATTERN = re.compile(r"SubPath(\d+)$", re.IGNORECASE)
+
+
+class PathIndex:
+    # Every recording under MAIN_PATHS from a single walk: by (subpath, path number), by misc name ("obby",
+    # "potion") and by file name. Folder mtimes change whenever a recording is added, removed or renamed,
+    # so lookups only stat the known folders (every check_interval seconds) and walk again when one moved
+    def __init__(self, base_path, check_interval=2.0):
+        self.base_path = os.path.abspath(base_path)
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.by_path = {}
+        self.by_misc = {}
+        self.by_name = {}
+        self.folder_mtimes = {}
+        self.last_check = 0
+        self.builds = 0
+        self.build()
+
+    def subpath_folder(self, subpath):
+        # Where the Record Path window saves, preferred when a recording exists in more than one place
+        return os.path.join(self.base_path, "EON1_New", f"EON1_SubPath{subpath}")
+
+    def folder_mtime(self, folder):
+        try:
+            return os.stat(folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def build(self):
+        by_path, by_misc, by_name, folder_mtimes = {}, {}, {}, {}
+        folder_mtimes[self.base_path] = self.folder_mtime(self.base_path)
+        for root, _, files in os.walk(self.base_path):
+            folder_mtimes[root] = self.folder_mtime(root)
+            folder = SUBPATH_FOLDER_PATTERN.search(os.path.basename(root))
+            for filename in files:
+                path = os.path.join(root, filename)
+                # First one found wins, like the os.walk search this replaces
+                by_name.setdefault(filename, path)
+
+                path_match = PATH_FILE_PATTERN.match(filename)
+                if path_match and folder:
+                    subpath = int(folder.group(1))
+                    key = (subpath, int(path_match.group(1)))
+                    if key not in by_path or root == self.subpath_folder(subpath):
+                        by_path[key] = path
+                    continue
+                misc_match = MISC_FILE_PATTERN.match(filename)
+                if misc_match:
+                    by_misc.setdefault(misc_match.group(1).lower(), path)
+
+        with self.lock:
+            self.by_path, self.by_misc, self.by_name = by_path, by_misc, by_name
+            self.folder_mtimes = folder_mtimes
+            self.last_check = time.monotonic()
+            self.builds += 1
+
+    def stale(self):
+        return any(self.folder_mtime(folder) != mtime for folder, mtime in self.folder_mtimes.items())
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+        if force or self.stale():
+            self.build()
+
+    def subpath(self, subpath, number):
+        self.refresh()
+        return self.by_path.get((subpath, number))
+
+    def misc(self, name):
+        self.refresh()
+        return self.by_misc.get(name.lower())
+
+    def find(self, filename):
+        self.refresh()
+        return self.by_name.get(filename)
+
+    def stats(self):
+        return {"recordings": len(self.by_name), "folders": len(self.folder_mtimes), "builds": self.builds}
+
+
+path_indexes = {}
+path_indexes_lock = threading.Lock()
+
+
+def get_path_index(base_path):
+    # One index per folder, shared by the macro loop and the Record Path window
+    base_path = os.path.abspath(base_path)
+    with path_indexes_lock:
+        index = path_indexes.get(base_path)
+        if index is None:
+            index = PathIndex(base_path)
+            path_indexes[base_path] = index
+        return index
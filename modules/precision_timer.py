@@ -0,0 +1,86 @@
+import threading, time
+
+
+class PrecisionTimer:
+    # Waits for a perf_counter deadline without pinning a core: sleeps until spin_threshold (plus how far
+    # sleeps have been overshooting lately) before the deadline, then spins for the rest. Sleeps are cut
+    # into check_interval slices so a stop request is noticed within that long
+    def __init__(self, spin_threshold=0.0008, check_interval=0.02, max_overshoot=0.02):
+        self.spin_threshold = spin_threshold
+        self.check_interval = check_interval
+        self.max_overshoot = max_overshoot
+        # Moving average of how much later than asked time.sleep returns (timer resolution, busy threads)
+        self.overshoot = 0.0
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.waits = 0
+            self.late_total = 0.0
+            self.late_max = 0.0
+            self.slept = 0.0
+            self.spun = 0.0
+            self.cpu_time = 0.0
+
+    def sleep(self, seconds):
+        start = time.perf_counter()
+        time.sleep(seconds)
+        slept = time.perf_counter() - start
+        overshoot = min(max(slept - seconds, 0.0), self.max_overshoot)
+        self.overshoot += (overshoot - self.overshoot) * 0.1
+        return slept
+
+    def wait_until(self, deadline, should_stop=None):
+        # Returns False if should_stop() turned true before the deadline
+        perf_counter = time.perf_counter
+        cpu_start = time.thread_time()
+        slept = spun = 0.0
+
+        while True:
+            remaining = deadline - perf_counter() - self.spin_threshold - self.overshoot
+            if remaining <= 0:
+                break
+            if should_stop and should_stop():
+                self.record(None, slept, spun, cpu_start)
+                return False
+            slept += self.sleep(min(remaining, self.check_interval))
+
+        spin_start = perf_counter()
+        next_check = spin_start + self.check_interval
+        now = spin_start
+        while now < deadline:
+            if now >= next_check:
+                if should_stop and should_stop():
+                    self.record(None, slept, now - spin_start, cpu_start)
+                    return False
+                next_check = now + self.check_interval
+            now = perf_counter()
+        spun = now - spin_start
+
+        self.record(now - deadline, slept, spun, cpu_start)
+        return True
+
+    def record(self, lateness, slept, spun, cpu_start):
+        with self.lock:
+            self.slept += slept
+            self.spun += spun
+            self.cpu_time += time.thread_time() - cpu_start
+            if lateness is None:
+                return
+            self.waits += 1
+            self.late_total += lateness
+            self.late_max = max(self.late_max, lateness)
+
+    def stats(self):
+        with self.lock:
+            waited = self.slept + self.spun
+            return {
+                "waits": self.waits,
+                "mean_late_ms": round(self.late_total / self.waits * 1000, 3) if self.waits else 0.0,
+                "max_late_ms": round(self.late_max * 1000, 3),
+                "overshoot_ms": round(self.overshoot * 1000, 3),
+                "spin_share": round(self.spun / waited, 3) if waited else 0.0,
+                # CPU time burnt while waiting against the time waited, 1.0 is a busy loop
+                "cpu_share": round(self.cpu_time / waited, 3) if waited else 0.0,
+            }
@@ -1,14 +1,22 @@
-import time, os, json, threading
+import time, json, os, threading
 from pynput import mouse, keyboard
+from modules.config_store import get_config_store
+from modules.precision_timer import PrecisionTimer
+from modules.replay_trace import ReplayTrace
+from modules.compiled_recording import CompiledRecording, get_recording_cache, AZERTY_MAP, MOUSE_PRESS, MOUSE_RELEASE, MOUSE_MOVE, KEY_PRESS, KEY_RELEASE
 
 class RecordPath:
     def __init__(self, filename="path_record.json", stop_key=keyboard.Key.esc, running_event=None):
-        with open(os.path.expandvars("%appdata%/DSIM/config.json"), 'r') as config_file:
-            config = json.load(config_file)
-        
-        self.azerty_keyboard = config.get("AZERTY_Keyboard", False)
+        self.config = get_config_store()
         self.filename = filename
         self.actions = []
+        # What replay_actions plays, loaded recordings come compiled from the shared cache
+        self.compiled = None
+        self.recording_cache = get_recording_cache()
+        self.timer = PrecisionTimer()
+        self.loaded_path = None
+        # The last replay's trace when ReplayTrace is on in the config
+        self.last_trace = None
         self.start_time = None
         self.recording = False
         self.stop_recording_flag = False
@@ -22,13 +30,8 @@ class RecordPath:
         self.keyboard_controller = keyboard.Controller()
 
     def convert_key_layout(self, key):
-        if self.azerty_keyboard:
-            azerty_map = {
-                'a': 'q', 'q': 'a',
-                'w': 'z', 'z': 'w',
-                's': 's', 'd': 'd'
-            }
-            return azerty_map.get(key, key)
+        if self.config.get_bool("AZERTY_Keyboard"):
+            return AZERTY_MAP.get(key, key)
         return key
 
     def record_mouse(self, x, y, button, pressed):
@@ -62,88 +65,101 @@ class RecordPath:
     def save_recording(self):
         with open(self.filename, "w") as f:
             json.dump(self.actions, f, indent=2)
+        self.compiled = None
         print(f"Actions saved to {self.filename}")
 
     def load_recording(self, filename=None):
         path_to_load = filename if filename else self.filename
         try:
-            with open(path_to_load, "r") as f:
-                self.actions = json.load(f)
+            self.compiled = self.recording_cache.load(path_to_load, self.config.get_bool("AZERTY_Keyboard"))
+            self.loaded_path = path_to_load
             print(f"Actions loaded from {path_to_load}")
         except FileNotFoundError:
+            self.compiled = None
             print(f"No recording found at {path_to_load}")
 
+    def preload(self, paths):
+        # Compiles recordings before they're needed, replays then start without touching the disk
+        return self.recording_cache.preload(paths, self.config.get_bool("AZERTY_Keyboard"))
+
     def replay_actions(self):
         print("Replaying actions...")
-        if not self.actions:
+        compiled = self.compiled
+        if compiled is None and self.actions:
+            # Just recorded, not loaded from a file
+            compiled = CompiledRecording.from_actions(self.actions, self.config.get_bool("AZERTY_Keyboard"))
+        if not compiled:
             print("No actions recorded.")
             return
 
         self.stop_replay_flag = False
-        start_time = time.perf_counter()
-
-        key_map = {
-            "Key.space": keyboard.Key.space,
-            "Key.enter": keyboard.Key.enter,
-            "Key.shift": keyboard.Key.shift,
-            "Key.ctrl": keyboard.Key.ctrl,
-            "Key.alt": keyboard.Key.alt,
-            "Key.esc": keyboard.Key.esc,
-        }
+        # Everything the loop touches, resolved before the first action
+        timestamps, events, targets = compiled.timestamps, compiled.events, compiled.action_targets
+        xs, ys = compiled.xs, compiled.ys
+        mouse_controller, keyboard_controller = self.mouse_controller, self.keyboard_controller
+        pressed_keys, pressed_mouse_buttons = self.pressed_keys, self.pressed_mouse_buttons
+        running_event = self.running_event
+        should_stop = lambda: self.stop_replay_flag or (running_event and not running_event.is_set())
+        timer = self.timer
+        timer.spin_threshold = self.config.get_float("ReplaySpinThresholdMs", 0.8) / 1000
+        timer.check_interval = self.config.get_float("ReplayStopCheckMs", 20) / 1000
+        timer.reset()
+        wait_until = timer.wait_until
+        perf_counter = time.perf_counter
+        trace = None
+        if self.config.get_bool("ReplayTrace"):
+            name = os.path.splitext(os.path.basename(self.loaded_path))[0] if self.compiled is not None and self.loaded_path else "recording"
+            trace = ReplayTrace(len(compiled), name)
+        self.last_trace = trace
+        start_time = perf_counter()
 
         try:
-            for action in self.actions:
-                if self.stop_replay_flag or (self.running_event and not self.running_event.is_set()):
+            for index in range(len(timestamps)):
+                if should_stop():
                     print("Replay stopped.")
                     break
 
-                target_time = start_time + action["timestamp"]
-                while time.perf_counter() < target_time:
-                    if self.stop_replay_flag or (self.running_event and not self.running_event.is_set()):
-                        print("Replay stopped while waiting for next action.")
-                        return
-
-                # Replay mouse actions
-                if action["type"] == "mouse":
-                    x, y = action["x"], action["y"]
-                    button = action["button"]
-                    if action["pressed"]:
-                        self.mouse_controller.position = (x, y)
-                        if button == "Button.left":
-                            self.pressed_mouse_buttons.add(mouse.Button.left)
-                            self.mouse_controller.press(mouse.Button.left)
-                        elif button == "Button.right":
-                            self.pressed_mouse_buttons.add(mouse.Button.right)
-                            self.mouse_controller.press(mouse.Button.right)
-                    else:
-                        if button == "Button.left":
-                            self.mouse_controller.release(mouse.Button.left)
-                            self.pressed_mouse_buttons.discard(mouse.Button.left)
-                        elif button == "Button.right":
-                            self.mouse_controller.release(mouse.Button.right)
-                            self.pressed_mouse_buttons.discard(mouse.Button.right)
-
-                # Replay keyboard actions
-                elif action["type"] == "keyboard":
-                    key_str = self.convert_key_layout(action["key"])
-                    try:
-                        if key_str in key_map:
-                            key = key_map[key_str]
-                        else:
-                            key = key_str.replace("'", "")
+                # Sleeps most of the gap and spins only right before the action, the detector threads keep the GIL
+                if not wait_until(start_time + timestamps[index], should_stop):
+                    print("Replay stopped while waiting for next action.")
+                    return
 
-                        if action["pressed"]:
-                            self.pressed_keys.add(key)
-                            self.keyboard_controller.press(key)
+                event = events[index]
+                target = targets[index]
+                if trace is not None:
+                    injected = perf_counter()
+                if event == KEY_PRESS or event == KEY_RELEASE:
+                    try:
+                        if event == KEY_PRESS:
+                            pressed_keys.add(target)
+                            keyboard_controller.press(target)
                         else:
-                            self.keyboard_controller.release(key)
-                            self.pressed_keys.discard(key)
-
+                            keyboard_controller.release(target)
+                            pressed_keys.discard(target)
                     except Exception as e:
-                        print(f"Error replaying key {key_str}: {e}")
+                        print(f"Error replaying key {compiled.target_names[compiled.target_ids[index]]}: {e}")
+                elif event == MOUSE_PRESS:
+                    mouse_controller.position = (xs[index], ys[index])
+                    pressed_mouse_buttons.add(target)
+                    mouse_controller.press(target)
+                elif event == MOUSE_RELEASE:
+                    mouse_controller.release(target)
+                    pressed_mouse_buttons.discard(target)
+                elif event == MOUSE_MOVE:
+                    mouse_controller.position = (xs[index], ys[index])
+
+                if trace is not None:
+                    trace.record(index, timestamps[index], injected - start_time, perf_counter() - injected, event)
 
         finally:
             self.cleanup_pressed_inputs()
+            timing = timer.stats()
+            print(f"Replay timing: {timing['waits']} actions, {timing['mean_late_ms']} ms late on average, "
+                  f"{timing['max_late_ms']} ms at worst, {timing['cpu_share']:.0%} CPU while waiting")
+            if trace is not None:
+                stats = trace.stats()
+                path = trace.dump()
+                print(f"Replay trace: {stats}" + (f", saved to {path}" if path else ""))
             
     def cleanup_pressed_inputs(self):
         for key in list(self.pressed_keys):
@@ -166,6 +182,7 @@ class RecordPath:
         self.recording = True
         self.start_time = None
         self.actions = []
+        self.compiled = None
         self.stop_recording_flag = False
 
         with mouse.Listener(on_click=self.on_click) as mouse_listener, \
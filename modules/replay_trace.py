@@ -0,0 +1,64 @@
+import csv, os, time
+from array import array
+
+TRACE_DIR = os.path.expandvars("%appdata%/DSIM/replay_traces")
+
+
+class ReplayTrace:
+    # What a replay actually did, one slot per action allocated up front so recording it costs a few
+    # array stores: when the action was due, when it was injected and how long the controller call took
+    # (seconds from the replay start)
+    def __init__(self, count, name="replay"):
+        self.name = name
+        self.scheduled = array("d", bytes(8 * count))
+        self.actual = array("d", bytes(8 * count))
+        self.call_time = array("d", bytes(8 * count))
+        self.events = array("B", bytes(count))
+        self.recorded = 0
+
+    def record(self, index, scheduled, actual, call_time, event):
+        self.scheduled[index] = scheduled
+        self.actual[index] = actual
+        self.call_time[index] = call_time
+        self.events[index] = event
+        self.recorded = index + 1
+
+    def lateness(self):
+        return [self.actual[index] - self.scheduled[index] for index in range(self.recorded)]
+
+    def stats(self):
+        lateness = sorted(self.lateness())
+        if not lateness:
+            return {"actions": 0}
+        # Drift is how far off the schedule an action landed either way
+        drift = max(abs(lateness[0]), abs(lateness[-1]))
+        p99 = lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))]
+        return {
+            "actions": self.recorded,
+            "mean_late_ms": round(sum(lateness) / len(lateness) * 1000, 3),
+            "p99_late_ms": round(p99 * 1000, 3),
+            "max_drift_ms": round(drift * 1000, 3),
+            "controller_ms": round(sum(self.call_time[:self.recorded]) * 1000, 3),
+        }
+
+    def dump(self, folder=TRACE_DIR, keep=20):
+        # One CSV per replay, ready to plot lateness against time. Only the newest keep files are kept
+        try:
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"{time.strftime('%Y%m%d_%H%M%S')}_{self.name}.csv")
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["index", "event", "scheduled_s", "actual_s", "late_ms", "controller_ms"])
+                for index in range(self.recorded):
+                    writer.writerow([
+                        index, self.events[index], f"{self.scheduled[index]:.6f}", f"{self.actual[index]:.6f}",
+                        f"{(self.actual[index] - self.scheduled[index]) * 1000:.3f}", f"{self.call_time[index] * 1000:.3f}",
+                    ])
+
+            traces = sorted(file for file in os.listdir(folder) if file.endswith(".csv"))
+            for old in traces[:-keep]:
+                os.remove(os.path.join(folder, old))
+            return path
+        except OSError as e:
+            print(f"Could not save replay trace: {e}")
+            return None
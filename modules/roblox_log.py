@@ -0,0 +1,127 @@
+import glob, json, os, re, sys, time
+
+# Sol's RNG reports the biome through Bloxstrap rich presence, the hover text of the large image is the biome name
+BIOME_LINE_PATTERN = re.compile(r'"largeImage"\s*:\s*\{[^{}]*"hoverText"\s*:\s*"([^"]+)"')
+NO_BIOME = "normal"
+
+
+class RobloxLogTailer:
+    # Follows the newest Roblox client log, returning only the complete lines appended since the last poll
+    def __init__(self, log_dir=None, backlog_bytes=256 * 1024):
+        if log_dir is None:
+            log_dir = os.path.expandvars("%localappdata%/Roblox/logs")
+        self.log_dir = log_dir
+        # When attaching to a log that was already being written, only its end is read back
+        self.backlog_bytes = backlog_bytes
+        self.path = None
+        self.file_id = None
+        self.offset = 0
+        self.partial = b""
+        self.attached = False
+
+    def newest_log(self):
+        logs = glob.glob(os.path.join(self.log_dir, "*.log"))
+        if not logs:
+            return None
+        return max(logs, key=lambda path: os.stat(path).st_mtime)
+
+    def attach(self, path, from_start):
+        stat = os.stat(path)
+        self.path = path
+        self.file_id = (stat.st_dev, stat.st_ino)
+        self.offset = 0 if from_start else max(stat.st_size - self.backlog_bytes, 0)
+        self.partial = b""
+
+    def poll(self):
+        try:
+            newest = self.newest_log()
+            if newest is None:
+                self.path = None
+                return []
+
+            if newest != self.path:
+                # A log that appears after we started is a new session, read it whole
+                self.attach(newest, from_start=self.attached)
+            self.attached = True
+
+            stat = os.stat(self.path)
+            if (stat.st_dev, stat.st_ino) != self.file_id or stat.st_size < self.offset:
+                # Same name but replaced or truncated, start over
+                self.attach(self.path, from_start=True)
+            if stat.st_size == self.offset:
+                return []
+
+            with open(self.path, "rb") as file:
+                file.seek(self.offset)
+                data = file.read(stat.st_size - self.offset)
+            self.offset += len(data)
+        except OSError:
+            return []
+
+        data = self.partial + data
+        lines = data.split(b"\n")
+        # The last piece has no newline yet, keep it for the next poll
+        self.partial = lines.pop()
+        return [line.decode("utf-8", errors="replace").rstrip("\r") for line in lines]
+
+
+class RobloxLogBiomeSource:
+    # Biome from the Roblox log instead of OCR. names are the biome keys the detector knows (biome_data)
+    def __init__(self, names, log_dir=None, tailer=None):
+        self.tailer = tailer if tailer is not None else RobloxLogTailer(log_dir)
+        self.names = {self.normalize(name): name for name in names}
+        self.names[NO_BIOME] = None
+        self.biome = None
+        self.log_path = None
+        self.seen_biome = False
+        self.lines_read = 0
+
+    def normalize(self, name):
+        return re.sub(r"[^a-z]", "", name.lower())
+
+    def parse(self, line):
+        # Biome key, None for the normal biome, or False if the line says nothing about the biome
+        if "hoverText" not in line:
+            return False
+        match = BIOME_LINE_PATTERN.search(line)
+        if not match:
+            return False
+        name = self.normalize(match.group(1))
+        if name not in self.names:
+            print(f"Unknown biome in Roblox log: {match.group(1)}")
+            return False
+        return self.names[name]
+
+    def poll(self):
+        # Returns (changed, biome) for the latest biome line since the last poll
+        lines = self.tailer.poll()
+        if self.tailer.path != self.log_path:
+            # New session, nothing known until its first biome line
+            self.log_path = self.tailer.path
+            self.seen_biome = False
+        self.lines_read += len(lines)
+
+        changed = False
+        for line in lines:
+            biome = self.parse(line)
+            if biome is False:
+                continue
+            changed = changed or biome != self.biome or not self.seen_biome
+            self.biome = biome
+            self.seen_biome = True
+        return changed, self.biome
+
+    def active(self):
+        # Only trusted once the current log has reported a biome, until then OCR stays in charge
+        return self.log_path is not None and self.seen_biome
+
+
+if __name__ == "__main__":
+    # Follow a log folder and print biome changes: python -m modules.roblox_log [log_dir]
+    biome_names = ["Windy", "Rainy", "Snowy", "Sandstorm", "Hell", "Starfall", "Corruption", "Null", "Glitched", "Graveyard", "Pumpkin Moon"]
+    source = RobloxLogBiomeSource(biome_names, sys.argv[1] if len(sys.argv) > 1 else None)
+    while True:
+        changed, biome = source.poll()
+        if changed:
+            print(json.dumps({"log": source.log_path, "biome": biome}))
+        time.sleep(1)
@@ -1,5 +1,5 @@
-import json, os
 import tkinter as tk
+from modules.config_store import get_config_store
 
 class SnippingWidget:
     def __init__(self, root, config_key=None, callback=None):
@@ -59,13 +59,7 @@ class SnippingWidget:
 
     def save_region_to_config(self, region):
         try:
-            with open(os.path.expandvars("%appdata%/DSIM/config.json"), "r") as config_file:
-                config = json.load(config_file)
-
-            config[self.config_key] = region
-
-            with open(os.path.expandvars("%appdata%/DSIM/config.json"), "w") as config_file:
-                json.dump(config, config_file, indent=4)
+            get_config_store().set(self.config_key, region)
         except Exception as e:
             print(f"Failed to save region to config.json: {e}")
 
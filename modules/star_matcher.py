@@ -0,0 +1,176 @@
+import cv2, os
+import numpy as np
+
+
+class StarMatcher:
+    def __init__(self, images_dir=None, pyramid_scale=1.0, threshold=0.75, color_order="BGR"):
+        if images_dir is None:
+            images_dir = os.path.join(os.path.dirname(__file__), "../images/Stars_Ref")
+
+        self.star_ref_4_corner = [
+            cv2.imread(os.path.join(images_dir, "4_corner_star.png"), cv2.IMREAD_GRAYSCALE),
+            cv2.imread(os.path.join(images_dir, "4_corner_star_2.png"), cv2.IMREAD_GRAYSCALE)
+        ]
+
+        self.star_refs_8_corner = [
+            cv2.imread(os.path.join(images_dir, "8_corner_star.png"), cv2.IMREAD_GRAYSCALE),
+            cv2.imread(os.path.join(images_dir, "8_corner_star_2.png"), cv2.IMREAD_GRAYSCALE)
+        ]
+
+        if any(ref is None for ref in self.star_ref_4_corner) or any(ref is None for ref in self.star_refs_8_corner):
+            raise FileNotFoundError("Star reference images not found in 'images/Stars_Ref' folder. Try putting your own star as reference.")
+
+        self.threshold = threshold
+        self.gray_conversion = cv2.COLOR_RGB2GRAY if color_order == "RGB" else cv2.COLOR_BGR2GRAY
+        self.ignored_4_corner_count = 0
+        self.max_ignored_threshold = 2
+        # Cap on the positions above threshold checked for a black background, strongest kept
+        self.max_candidates = 4096
+
+        # Pyramid mode: match on a downscaled frame, then re-check the best coarse hits at full resolution
+        self.pyramid_top_k = 5
+        self.pyramid_coarse_threshold = 0.6
+        self.set_pyramid_scale(pyramid_scale)
+
+    def set_pyramid_scale(self, scale):
+        # scale >= 1 keeps the full resolution path
+        self.pyramid_scale = float(scale) if scale and 0 < scale < 1 else 1.0
+        self.small_refs = {}
+        if self.pyramid_scale < 1:
+            for star_ref in self.star_ref_4_corner + self.star_refs_8_corner:
+                self.small_refs[id(star_ref)] = self.downscale(star_ref)
+
+    def downscale(self, image):
+        return cv2.resize(image, None, fx=self.pyramid_scale, fy=self.pyramid_scale, interpolation=cv2.INTER_AREA)
+
+    def is_pure_black_background(self, image, bbox):
+        return bool(self.black_background_mask(image, np.array([bbox]))[0])
+
+    def black_background_mask(self, image, boxes, tolerance=5):
+        # boxes is (N, 4) of x, y, w, h, all four corner samples of every box are read in one fancy index
+        x, y, w, h = (boxes[:, i] for i in range(4))
+        ys = np.stack([y, y, y + h - 10, y + h - 10], axis=1)
+        xs = np.stack([x - 10, x + w - 10, x, x + w - 10], axis=1)
+        corners = image[ys, xs].reshape(len(boxes), -1)
+        return np.all(corners < tolerance, axis=1)
+
+    def candidate_points(self, res, threshold):
+        # Positions above threshold, strongest first, at most max_candidates of them
+        ys, xs = np.nonzero(res >= threshold)
+        scores = res[ys, xs]
+        if scores.size > self.max_candidates:
+            keep = np.argpartition(scores, -self.max_candidates)[-self.max_candidates:]
+            ys, xs, scores = ys[keep], xs[keep], scores[keep]
+        order = np.argsort(-scores, kind="stable")
+        return xs[order], ys[order], scores[order]
+
+    def find_peaks(self, res, template_shape, threshold, top_k):
+        # Up to top_k (score, x, y) maxima, each one suppresses a half template around it
+        peaks = []
+        if res.size == 0:
+            return peaks
+        res = res.copy()
+        suppress_h, suppress_w = template_shape[0] // 2 + 1, template_shape[1] // 2 + 1
+        for _ in range(top_k):
+            _, max_val, _, (px, py) = cv2.minMaxLoc(res)
+            if max_val < threshold:
+                break
+            peaks.append((max_val, px, py))
+            res[max(py - suppress_h, 0):py + suppress_h, max(px - suppress_w, 0):px + suppress_w] = -1
+        return peaks
+
+    def match_template(self, gray, star_ref, small_gray=None):
+        # A region smaller than the template can't contain the star
+        if gray.shape[0] < star_ref.shape[0] or gray.shape[1] < star_ref.shape[1]:
+            return np.empty((0, 0), dtype=np.float32)
+        if small_gray is None:
+            return cv2.matchTemplate(gray, star_ref, cv2.TM_CCOEFF_NORMED)
+        return self.pyramid_match_template(gray, star_ref, small_gray)
+
+    def pyramid_match_template(self, gray, star_ref, small_gray):
+        # Same shape as a full resolution result, but only filled around the coarse candidates
+        h, w = star_ref.shape
+        res_h, res_w = gray.shape[0] - h + 1, gray.shape[1] - w + 1
+        res = np.full((max(res_h, 0), max(res_w, 0)), -1.0, dtype=np.float32)
+        small_ref = self.small_refs[id(star_ref)]
+        if res.size == 0 or small_gray.shape[0] < small_ref.shape[0] or small_gray.shape[1] < small_ref.shape[1]:
+            return res
+
+        coarse = cv2.matchTemplate(small_gray, small_ref, cv2.TM_CCOEFF_NORMED)
+        margin = int(np.ceil(1 / self.pyramid_scale)) * 2 + 2
+
+        for _, px, py in self.find_peaks(coarse, small_ref.shape, self.pyramid_coarse_threshold, self.pyramid_top_k):
+            cx, cy = int(round(px / self.pyramid_scale)), int(round(py / self.pyramid_scale))
+            x0, y0 = max(cx - margin, 0), max(cy - margin, 0)
+            x1, y1 = min(cx + margin, res_w - 1), min(cy + margin, res_h - 1)
+            if x0 > x1 or y0 > y1:
+                continue
+
+            local = cv2.matchTemplate(gray[y0:y1 + h, x0:x1 + w], star_ref, cv2.TM_CCOEFF_NORMED)
+            window = res[y0:y0 + local.shape[0], x0:x0 + local.shape[1]]
+            np.maximum(window, local, out=window)
+        return res
+
+    def crop_region(self, image, roi):
+        # Clamp (x, y, w, h) to the image and return it as a view, plus the offset of that view
+        if roi is None:
+            return image, 0, 0
+        x, y, w, h = (int(v) for v in roi)
+        x0, y0 = min(max(x, 0), image.shape[1]), min(max(y, 0), image.shape[0])
+        x1, y1 = min(max(x + w, x0), image.shape[1]), min(max(y + h, y0), image.shape[0])
+        return image[y0:y1, x0:x1], x0, y0
+
+    def detect(self, image, roi=None):
+        # roi restricts matching to (x, y, w, h) of the image, returned boxes stay in image coordinates
+        view, offset_x, offset_y = self.crop_region(image, roi)
+        if view.size == 0:
+            return None, None
+
+        return self.detect_in_view(image, view, offset_x, offset_y)
+
+    def detect_in_view(self, image, view, offset_x, offset_y):
+        gray = cv2.cvtColor(view, self.gray_conversion)
+        small_gray = self.downscale(gray) if self.pyramid_scale < 1 else None
+
+        # Detect 4-corner star
+        max_confidence_4 = 0
+        best_4_corner_bbox = None
+        for star_ref in self.star_ref_4_corner:
+            res_4_corner = self.match_template(gray, star_ref, small_gray)
+            xs, ys, scores = self.candidate_points(res_4_corner, self.threshold)
+            confidence_4 = scores[0] if scores.size else 0
+
+            if confidence_4 > max_confidence_4:
+                max_confidence_4 = confidence_4
+                # Strongest candidate that sits on a pure black background
+                boxes = np.stack([xs + offset_x, ys + offset_y, np.full_like(xs, star_ref.shape[1]), np.full_like(xs, star_ref.shape[0])], axis=1)
+                passed = np.flatnonzero(self.black_background_mask(image, boxes))
+                if passed.size:
+                    self.ignored_4_corner_count = 0
+                    best_4_corner_bbox = tuple(int(v) for v in boxes[passed[0]])
+                else:
+                    self.ignored_4_corner_count += 1
+
+        # Detect 8-corner star
+        max_confidence_8 = 0
+        best_8_corner_bbox = None
+        for star_ref in self.star_refs_8_corner:
+            res_8_corner = self.match_template(gray, star_ref, small_gray)
+            peaks = self.find_peaks(res_8_corner, star_ref.shape, self.threshold, 1)
+            confidence_8 = peaks[0][0] if peaks else 0
+
+            if confidence_8 > max_confidence_8:
+                max_confidence_8 = confidence_8
+                _, px, py = peaks[0]
+                best_8_corner_bbox = (px + offset_x, py + offset_y, star_ref.shape[1], star_ref.shape[0])
+
+        if self.ignored_4_corner_count >= self.max_ignored_threshold:
+            if max_confidence_8 >= self.threshold:
+                return best_8_corner_bbox, "8_corners"
+            return None, None
+
+        if max_confidence_8 > max_confidence_4 and max_confidence_8 >= self.threshold:
+            return best_8_corner_bbox, "8_corners"
+        elif max_confidence_4 >= self.threshold and best_4_corner_bbox is not None:
+            return best_4_corner_bbox, "4_corners"
+        return None, None
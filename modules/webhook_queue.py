@@ -0,0 +1,142 @@
+import json, threading, time
+from collections import deque
+import requests
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+MERGE = "merge"
+
+
+class WebhookQueue:
+    # Posts webhooks from a background thread so a slow Discord never stalls detection
+    # policy decides what happens to a new message: "merge" replaces a pending one with the same key,
+    # then like "drop_oldest" discards the oldest pending message when full, "drop_newest" discards the new one
+    def __init__(self, max_size=8, policy=MERGE, max_retries=2, timeout=15):
+        self.max_size = max(int(max_size), 1)
+        self.policy = policy if policy in (DROP_OLDEST, DROP_NEWEST, MERGE) else MERGE
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.closed = False
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.merged = 0
+        # Seconds between submit and the start of the upload, and the upload itself
+        self.queue_latencies = deque(maxlen=256)
+        self.delivery_times = deque(maxlen=256)
+
+    def submit(self, url, payload, files=None, key=None, on_sent=None):
+        # files is a list of (filename, bytes, mime type), on_sent runs on the worker after a successful post
+        # Returns False if the message was dropped instead of queued
+        if not url:
+            return False
+
+        job = {"url": url, "payload": payload, "files": files or [], "key": key, "on_sent": on_sent, "submitted": time.perf_counter()}
+        with self.condition:
+            if self.closed:
+                return False
+
+            if self.policy == MERGE and key is not None:
+                for index, pending in enumerate(self.pending):
+                    if pending["key"] == key:
+                        # Keep the place in line and the original submit time, send the newer content
+                        job["submitted"] = pending["submitted"]
+                        self.pending[index] = job
+                        self.merged += 1
+                        return True
+
+            if len(self.pending) >= self.max_size:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return False
+                self.pending.popleft()
+
+            self.pending.append(job)
+            self.ensure_worker()
+            self.condition.notify()
+        return True
+
+    def ensure_worker(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.worker, name="WebhookQueue", daemon=True)
+            self.thread.start()
+
+    def worker(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                job = self.pending.popleft()
+
+            started = time.perf_counter()
+            self.queue_latencies.append(started - job["submitted"])
+            try:
+                ok = self.deliver(job)
+            except Exception as e:
+                print(f"Webhook delivery failed: {e}")
+                ok = False
+            self.delivery_times.append(time.perf_counter() - started)
+
+            if ok:
+                self.sent += 1
+                if job["on_sent"]:
+                    try:
+                        job["on_sent"]()
+                    except Exception as e:
+                        print(f"Webhook callback failed: {e}")
+            else:
+                self.failed += 1
+
+    def deliver(self, job):
+        for attempt in range(self.max_retries + 1):
+            files = {f"file{index}" if index else "file": file for index, file in enumerate(job["files"])}
+            response = requests.post(job["url"], data={"payload_json": json.dumps(job["payload"])}, files=files or None, timeout=self.timeout)
+            if response.status_code in (200, 204):
+                return True
+
+            # Discord rate limit, wait as long as it asks then try again
+            if response.status_code == 429 and attempt < self.max_retries:
+                try:
+                    retry_after = float(response.json().get("retry_after", 1))
+                except ValueError:
+                    retry_after = 1
+                time.sleep(min(retry_after, 30))
+                continue
+
+            print(f"Error: {response.text}")
+            return False
+        return False
+
+    def close(self, timeout=5):
+        # Lets the worker finish what's already queued, up to timeout seconds
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=timeout)
+
+    def stats(self):
+        def summary(samples):
+            samples = list(samples)
+            if not samples:
+                return {"last": None, "mean": None, "max": None}
+            return {"last": samples[-1], "mean": sum(samples) / len(samples), "max": max(samples)}
+
+        with self.condition:
+            pending = len(self.pending)
+        return {
+            "pending": pending,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "queue_latency": summary(self.queue_latencies),
+            "delivery_time": summary(self.delivery_times),
+        }